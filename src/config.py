@@ -17,15 +17,84 @@ OUTPUT_CSV_PATH = OUTPUT_DIR / "extracted_data.csv"
 CACHE_DIR = BASE_DIR / "cache"
 
 # --- LLM Configuration ---
+# With the cascade enabled, every document is first extracted with the cheap/fast model and
+# escalated to the stronger models (in order) only when local validation of the result fails.
+LLM_CASCADE_ENABLED = os.getenv("LLM_CASCADE_ENABLED", default="true").lower() == "true"
+# With both API keys set, route calls across Gemini and OpenAI and hedge slow ones.
+LLM_ROUTING_ENABLED = os.getenv("LLM_ROUTING_ENABLED", default="true").lower() == "true"
+# Stream extraction responses and parse each record as it closes, so complete records survive
+# a truncated response. Routed (two-provider) calls are not streamed.
+LLM_STREAMING_ENABLED = os.getenv("LLM_STREAMING_ENABLED", default="true").lower() == "true"
+
+# Cascade tiers per provider: the primary model followed by its escalation models.
+GEMINI_MODELS = (
+    ["gemini-2.5-flash", "gemini-2.5-pro"] if LLM_CASCADE_ENABLED else ["gemini-2.5-flash"]
+)
+OPENAI_MODELS = ["gpt-4o-mini", "gpt-4o"] if LLM_CASCADE_ENABLED else ["gpt-4o"]
+
 if GEMINI_API_KEY:
-    LLM_MODEL_NAME = "gemini-2.5-flash"  # "gemini-2.5-pro"
+    LLM_MODEL_NAME, *LLM_ESCALATION_MODELS = GEMINI_MODELS
+    # OpenAI becomes the secondary provider for routing and hedging when its key is set too.
+    LLM_SECONDARY_MODELS = OPENAI_MODELS if OPENAI_API_KEY and LLM_ROUTING_ENABLED else []
 elif OPENAI_API_KEY:
-    LLM_MODEL_NAME = "gpt-4o"
+    LLM_MODEL_NAME, *LLM_ESCALATION_MODELS = OPENAI_MODELS
+    LLM_SECONDARY_MODELS = []
 else:
     raise ValueError(
         "No API key provided for either Gemini or OpenAI.  Please set GEMINI_API_KEY or OPENAI_API_KEY in .env"
     )
 
+# --- Multi-Provider Routing ---
+# A call still running after the chosen provider's HEDGE_LATENCY_PERCENTILE latency is
+# duplicated on the other provider; the first response wins and the other is cancelled.
+HEDGE_LATENCY_PERCENTILE = float(os.getenv("HEDGE_LATENCY_PERCENTILE", default="0.95"))
+# Hedge delay used until a provider has ROUTER_MIN_SAMPLES latency measurements.
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("HEDGE_DEFAULT_DELAY_SECONDS", default="20"))
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", default="10"))
+# Number of recent latency measurements kept per provider.
+ROUTER_LATENCY_WINDOW = int(os.getenv("ROUTER_LATENCY_WINDOW", default="200"))
+
+# --- Prompt Caching ---
+# Lay out extraction prompts as a stable static prefix (instructions + schema) followed by the
+# document, so Gemini/OpenAI prefix caching can reuse the repeated instruction block.
+PROMPT_CACHING_ENABLED = os.getenv("PROMPT_CACHING_ENABLED", default="true").lower() == "true"
+# Optional pre-created Gemini cached-content handle (``cachedContents/{id}``). When empty and
+# Gemini is used, an explicit cache for the static prefix is created on start-up.
+GEMINI_CACHED_CONTENT = os.getenv("GEMINI_CACHED_CONTENT", default="")
+GEMINI_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CACHE_TTL_SECONDS", default="3600"))
+
+# --- Token Budget Scheduler ---
+RUN_TOKEN_BUDGET = int(os.getenv("RUN_TOKEN_BUDGET", default="2000000"))
+DOCUMENT_TOKEN_BUDGET = int(os.getenv("DOCUMENT_TOKEN_BUDGET", default="60000"))
+RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", default="1800"))
+DOCUMENT_DEADLINE_SECONDS = float(os.getenv("DOCUMENT_DEADLINE_SECONDS", default="180"))
+# Tokens per LLM call beyond the document text: instructions, schema and output.
+CALL_OVERHEAD_TOKENS = int(os.getenv("CALL_OVERHEAD_TOKENS", default="2000"))
+# Dispatch order for documents: "size" (smallest first) or "age" (oldest first).
+SCHEDULER_PRIORITY = os.getenv("SCHEDULER_PRIORITY", default="size")
+
+# --- Near-Duplicate Detection ---
+SIMILARITY_INDEX_PATH = CACHE_DIR / "similarity_index.json"
+# Maximum Hamming distance between 64-bit SimHash fingerprints for two parsed documents to
+# be treated as the same bill (re-exports, reminders, different footer dates).
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", default="3"))
+
+# --- Learned Templates ---
+TEMPLATES_PATH = CACHE_DIR / "templates.json"
+# Maximum Hamming distance between layout fingerprints (values masked) for a learned vendor
+# template to be tried on a document before falling back to the LLM.
+TEMPLATE_MAX_DISTANCE = int(os.getenv("TEMPLATE_MAX_DISTANCE", default="8"))
+
+# --- Extraction Service ---
+SERVER_HOST = os.getenv("SERVER_HOST", default="0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", default="8080"))
+# Distinct documents running through the pipeline at once (protects the LLM quota).
+SERVER_MAX_CONCURRENT_EXTRACTIONS = int(os.getenv("SERVER_MAX_CONCURRENT_EXTRACTIONS", default="4"))
+# Distinct documents admitted (running + waiting) before new uploads are rejected with 503.
+SERVER_MAX_QUEUED_EXTRACTIONS = int(os.getenv("SERVER_MAX_QUEUED_EXTRACTIONS", default="32"))
+SERVER_MAX_UPLOAD_MB = int(os.getenv("SERVER_MAX_UPLOAD_MB", default="25"))
+UPLOADS_DIR = CACHE_DIR / "uploads"
+
 # --- Fields to Extract ---
 COLUMNS_TO_EXTRACT = [
     "Account Number",
@@ -45,4 +114,9 @@ if __name__ == "__main__":
     print(f"OpenAI API Key      : {'Set' if OPENAI_API_KEY else 'Not Set'}")
     print(f"Llama Cloud API Key : {'Set' if LLAMA_CLOUD_API_KEY else 'Not Set'}")
     print(f"LLM Model Name      : {LLM_MODEL_NAME}")
+    print(f"Escalation Models   : {LLM_ESCALATION_MODELS}")
+    print(f"Secondary Models    : {LLM_SECONDARY_MODELS}")
+    print(f"Prompt Caching      : {'Enabled' if PROMPT_CACHING_ENABLED else 'Disabled'}")
+    print(f"Streaming           : {'Enabled' if LLM_STREAMING_ENABLED else 'Disabled'}")
+    print(f"Templates Path      : {TEMPLATES_PATH}")
     print(f"Columns to Extract  : {COLUMNS_TO_EXTRACT}")
@@ -1,7 +1,10 @@
 import time
-from src.config import DOCUMENTS_DIR, OUTPUT_CSV_PATH, COLUMNS_TO_EXTRACT
+from src.config import DOCUMENTS_DIR, OUTPUT_CSV_PATH, COLUMNS_TO_EXTRACT, SCHEDULER_PRIORITY
 from src.utils.data_extractor import DataExtractor
 from src.utils.file_handler import get_pdf_files, save_to_csv
+from src.utils.token_budget import TokenBudgetScheduler
+from src.utils.similarity_index import NearDuplicateIndex
+from src.utils.template_learner import TemplateLearner
 
 
 def main():
@@ -18,12 +21,23 @@ def main():
 
     print(f"Found {len(pdf_files)} documents to process.")
 
+    # Bound the run's token spend and wall-clock time; see src/config.py for the budgets.
+    scheduler = TokenBudgetScheduler()
+    pdf_files = scheduler.prioritise(pdf_files, by=SCHEDULER_PRIORITY)
+
     # ----------------------------- Initialize the extractor -----------------------------
     # For standard documents:
-    extractor = DataExtractor()
+    extractor = DataExtractor(
+        scheduler=scheduler,
+        similarity_index=NearDuplicateIndex(),
+        template_learner=TemplateLearner(),
+    )
 
     # For long documents that might exceed context limits (Experimental):
-    # extractor = AdvancedDataExtractor(chunk_size=4000, chunk_overlap=300)
+    # extractor = AdvancedDataExtractor(
+    #     chunk_size=4000, chunk_overlap=300, scheduler=scheduler,
+    #     similarity_index=NearDuplicateIndex(), template_learner=TemplateLearner(),
+    # )
     # -------------------------------------------------------------------------------------
 
     all_extracted_records = []
@@ -39,6 +53,49 @@ def main():
     else:
         print("Extraction process finished, but no records were extracted.")
 
+    usage = extractor.llm_service.get_usage_report()
+    print(
+        f"LLM usage: {usage['calls']} calls, {usage['input_tokens']} input tokens "
+        f"({usage['cached_input_tokens']} cached, {usage['uncached_input_tokens']} uncached, "
+        f"{usage['cache_hit_ratio']:.0%} hit ratio), {usage['output_tokens']} output tokens"
+    )
+    if usage["hedged_calls"]:
+        print(
+            f"{usage['hedged_calls']} calls were hedged; cancelled requests report no tokens, "
+            "so the counts above are a lower bound."
+        )
+
+    cascade = extractor.llm_service.get_cascade_report()
+    if cascade["documents"]:
+        saved = cascade["latency_saved_seconds"]
+        print(
+            f"Model cascade: {cascade['escalated']}/{cascade['documents']} documents escalated "
+            f"({cascade['escalation_rate']:.0%}), estimated latency saved: "
+            f"{f'{saved:.2f} seconds' if saved is not None else 'n/a'}"
+        )
+
+    routing = extractor.llm_service.get_routing_report()
+    for provider, stats in (routing or {}).items():
+        p95 = ", ".join(
+            f"{key} {call['p95_latency']:.2f}s"
+            for key, call in stats["calls"].items()
+            if call["p95_latency"] is not None
+        )
+        print(
+            f"Provider {provider}: {stats['wins']}/{stats['requests']} requests won, "
+            f"{stats['errors']} errors, {stats['hedged']} hedged, p95 latency: {p95 or 'n/a'}"
+        )
+
+    budget = scheduler.get_report()
+    print(
+        f"Token budget: {budget['tokens_spent']} spent, {budget['tokens_remaining']} remaining, "
+        f"decisions {budget['decisions']}"
+    )
+    if budget["deferred"]:
+        print(f"Deferred to the next run: {', '.join(budget['deferred'])}")
+
+    extractor.llm_service.close()
+
     end_time = time.time()
     print(f"--- Process finished in {end_time - start_time:.2f} seconds ---")
 
@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from aiohttp import web
+
+from src.config import (
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_MAX_CONCURRENT_EXTRACTIONS,
+    SERVER_MAX_QUEUED_EXTRACTIONS,
+    SERVER_MAX_UPLOAD_MB,
+    UPLOADS_DIR,
+)
+
+
+class ServerOverloadedError(Exception):
+    """Raised when a new document cannot be admitted because the extraction queue is full."""
+
+
+class ExtractionService:
+    """
+    Runs uploaded PDFs through a DataExtractor with admission control and single-flight
+    coalescing: concurrent requests for identical content share one pipeline execution.
+    """
+
+    def __init__(
+        self,
+        extractor,
+        upload_dir: Path = UPLOADS_DIR,
+        max_concurrent: int = SERVER_MAX_CONCURRENT_EXTRACTIONS,
+        max_queued: int = SERVER_MAX_QUEUED_EXTRACTIONS,
+    ):
+        """
+        Initializes the ExtractionService.
+
+        Args:
+            extractor: The DataExtractor used to process documents.
+            upload_dir (Path): Where uploads are stored, keyed by content hash.
+            max_concurrent (int): Maximum number of documents extracted at the same time.
+            max_queued (int): Maximum number of distinct documents running or waiting.
+        """
+        self.extractor = extractor
+        self.upload_dir = Path(upload_dir)
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self.max_queued = max_queued
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"requests": 0, "executions": 0, "coalesced": 0, "rejected": 0}
+
+    def _store_upload(self, digest: str, data: bytes) -> Path:
+        """
+        Writes an upload to disk under its content hash. The modification time is pinned so
+        the PDFParser cache key depends only on the content, which lets uploads be deleted
+        after extraction while re-uploads still hit the parse cache.
+
+        Args:
+            digest (str): The SHA-256 hex digest of the content.
+            data (bytes): The PDF bytes.
+
+        Returns:
+            Path: The path of the stored PDF.
+        """
+        path = self.upload_dir / f"{digest}.pdf"
+        if not path.exists():
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(data)
+            os.utime(tmp_path, (0, 0))
+            tmp_path.replace(path)
+        return path
+
+    async def _run(self, digest: str, data: bytes) -> List[Dict[str, Any]]:
+        """
+        Executes the extraction pipeline once for a document.
+
+        Args:
+            digest (str): The SHA-256 hex digest of the content.
+            data (bytes): The PDF bytes.
+
+        Returns:
+            List[Dict[str, Any]]: The extracted records.
+        """
+        async with self._semaphore:
+            self.stats["executions"] += 1
+            path = self._store_upload(digest, data)
+            try:
+                return await asyncio.to_thread(self.extractor.extract_from_file, path)
+            finally:
+                # Only in-flight uploads are kept on disk.
+                path.unlink(missing_ok=True)
+
+    async def extract(self, data: bytes) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Extracts records from a PDF, joining an in-flight execution for the same content.
+
+        Args:
+            data (bytes): The PDF bytes.
+
+        Returns:
+            Tuple[str, List[Dict[str, Any]]]: The content hash and the extracted records.
+
+        Raises:
+            ServerOverloadedError: If the document is new and the queue is full.
+        """
+        self.stats["requests"] += 1
+        digest = hashlib.sha256(data).hexdigest()
+
+        flight = self._inflight.get(digest)
+        if flight is not None:
+            self.stats["coalesced"] += 1
+        else:
+            if len(self._inflight) >= self.max_queued:
+                self.stats["rejected"] += 1
+                raise ServerOverloadedError(f"{len(self._inflight)} documents already queued")
+            flight = asyncio.ensure_future(self._run(digest, data))
+            self._inflight[digest] = flight
+            flight.add_done_callback(lambda _: self._inflight.pop(digest, None))
+
+        # Shield the shared execution so one disconnecting client does not cancel it for all.
+        return digest, await asyncio.shield(flight)
+
+    @property
+    def inflight(self) -> int:
+        """Number of distinct documents currently running or waiting."""
+        return len(self._inflight)
+
+
+SERVICE_KEY = web.AppKey("extraction_service", ExtractionService)
+
+
+async def _read_upload(request: web.Request) -> Tuple[bytes, str]:
+    """
+    Reads the PDF from a multipart ``file`` field or a raw ``application/pdf`` body.
+
+    Args:
+        request (web.Request): The incoming request.
+
+    Returns:
+        Tuple[bytes, str]: The PDF bytes and the original file name.
+    """
+    if request.content_type.startswith("multipart/"):
+        form = await request.post()
+        field = form.get("file")
+        if not isinstance(field, web.FileField):
+            raise web.HTTPBadRequest(text="Expected a multipart 'file' field.")
+        return field.file.read(), field.filename or "upload.pdf"
+    filename = request.query.get("filename", "upload.pdf")
+    return await request.read(), filename
+
+
+async def handle_extract(request: web.Request) -> web.StreamResponse:
+    """
+    Extracts records from an uploaded PDF and streams them back as newline-delimited JSON.
+
+    Args:
+        request (web.Request): The incoming request.
+
+    Returns:
+        web.StreamResponse: One JSON record per line.
+    """
+    data, filename = await _read_upload(request)
+    if not data.startswith(b"%PDF"):
+        raise web.HTTPBadRequest(text="Upload is not a PDF document.")
+
+    try:
+        digest, records = await request.app[SERVICE_KEY].extract(data)
+    except ServerOverloadedError as e:
+        raise web.HTTPServiceUnavailable(text=f"Server busy: {e}", headers={"Retry-After": "5"})
+
+    response = web.StreamResponse(
+        headers={"Content-Type": "application/x-ndjson", "X-Content-SHA256": digest}
+    )
+    await response.prepare(request)
+    document_name = filename.split(".pdf")[0]
+    for record in records:
+        line = json.dumps({**record, "Filename": document_name})
+        await response.write(line.encode("utf-8") + b"\n")
+    await response.write_eof()
+    return response
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    """
+    Reports liveness and service counters.
+
+    Args:
+        request (web.Request): The incoming request.
+
+    Returns:
+        web.Response: JSON with request, execution, coalescing and rejection counts.
+    """
+    service = request.app[SERVICE_KEY]
+    return web.json_response({"status": "ok", "inflight": service.inflight, **service.stats})
+
+
+async def _close_extractor(app: web.Application) -> None:
+    """
+    Releases the extractor's LLM resources (e.g. the explicit Gemini cache) on shutdown.
+
+    Args:
+        app (web.Application): The application being cleaned up.
+    """
+    llm_service = getattr(app[SERVICE_KEY].extractor, "llm_service", None)
+    if llm_service is not None:
+        llm_service.close()
+
+
+def create_app(
+    extractor=None,
+    upload_dir: Path = UPLOADS_DIR,
+    max_concurrent: int = SERVER_MAX_CONCURRENT_EXTRACTIONS,
+    max_queued: int = SERVER_MAX_QUEUED_EXTRACTIONS,
+) -> web.Application:
+    """
+    Builds the aiohttp application.
+
+    Args:
+        extractor: The DataExtractor to use. Defaults to a new DataExtractor.
+        upload_dir (Path): Where uploads are stored, keyed by content hash.
+        max_concurrent (int): Maximum number of documents extracted at the same time.
+        max_queued (int): Maximum number of distinct documents running or waiting.
+
+    Returns:
+        web.Application: The configured application.
+    """
+    if extractor is None:
+        from src.utils.data_extractor import DataExtractor
+
+        extractor = DataExtractor()
+
+    app = web.Application(client_max_size=SERVER_MAX_UPLOAD_MB * 1024 * 1024)
+    app[SERVICE_KEY] = ExtractionService(extractor, upload_dir, max_concurrent, max_queued)
+    app.router.add_post("/extract", handle_extract)
+    app.router.add_get("/health", handle_health)
+    app.on_cleanup.append(_close_extractor)
+    return app
+
+
+def main(host: str = SERVER_HOST, port: int = SERVER_PORT):
+    """
+    Runs the HTTP extraction service.
+
+    Args:
+        host (str): The interface to bind to.
+        port (int): The port to listen on.
+    """
+    print("--- Starting ESG Flo Extraction Service ---")
+    web.run_app(create_app(), host=host, port=port)
+
+
+if __name__ == "__main__":
+    main()
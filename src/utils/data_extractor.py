@@ -1,8 +1,35 @@
+import time
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from src.schemas import ExtractedRecord
 from .pdf_parser import PDFParser
 from .llm_service import LLMService
+from .record_validator import validate_records
+from .token_budget import TokenBudgetScheduler, DEFER, PRUNED
+from .similarity_index import NearDuplicateIndex, simhash
+from .template_learner import TemplateLearner
+
+
+def _format_records(records: List[ExtractedRecord], file_path: Path) -> List[Dict[str, Any]]:
+    """
+    Converts extracted records to CSV-ready dictionaries tagged with the source file name.
+
+    Args:
+        records (List[ExtractedRecord]): The final records for a document.
+        file_path (Path): The path to the PDF file.
+
+    Returns:
+        List[Dict[str, Any]]: One dictionary per record, keyed by field alias.
+    """
+    formatted_records = []
+    for record in records:
+        record_dict = record.model_dump(by_alias=True, exclude_none=True)
+        record_dict["Filename"] = file_path.name.split(".pdf")[0]
+        print(record_dict)
+        formatted_records.append(record_dict)
+    return formatted_records
 
 
 class DataExtractor:
@@ -10,10 +37,50 @@ class DataExtractor:
     Orchestrates the data extraction process from a PDF document.
     """
 
-    def __init__(self):
-        """Initializes the DataExtractor with a PDF parser and LLM service."""
+    def __init__(
+        self,
+        scheduler: Optional[TokenBudgetScheduler] = None,
+        similarity_index: Optional[NearDuplicateIndex] = None,
+        template_learner: Optional[TemplateLearner] = None,
+    ):
+        """
+        Initializes the DataExtractor with a PDF parser and LLM service.
+
+        Args:
+            scheduler (Optional[TokenBudgetScheduler]): Enforces token and deadline budgets.
+                If None, documents are processed without limits.
+            similarity_index (Optional[NearDuplicateIndex]): Reuses extractions of
+                near-duplicate documents. If None, every document is extracted.
+            template_learner (Optional[TemplateLearner]): Learns vendor templates from LLM
+                extractions and applies them to later bills. If None, templates are not used.
+        """
         self.parser = PDFParser()
         self.llm_service = LLMService()
+        self.scheduler = scheduler
+        self.similarity_index = similarity_index
+        self.template_learner = template_learner
+
+    def _can_escalate(
+        self, checkpoint: Optional[int], allowance: int, document_text: str, started_at: float
+    ) -> bool:
+        """
+        Checks whether a document may be escalated to a stronger model.
+
+        Args:
+            checkpoint (Optional[int]): The scheduler checkpoint taken before extraction.
+            allowance (int): The document's token allowance.
+            document_text (str): The text re-sent by the escalation call.
+            started_at (float): ``time.monotonic()`` when the document started.
+
+        Returns:
+            bool: False once the document's deadline has passed or the escalation call
+                would exceed its token allowance.
+        """
+        if self.scheduler.document_deadline_exceeded(started_at):
+            return False
+        return self.scheduler.within_document_budget(
+            self.llm_service, checkpoint, allowance, [document_text]
+        )
 
     def extract_from_file(self, file_path: Path) -> List[Dict[str, Any]]:
         """
@@ -36,24 +103,95 @@ class DataExtractor:
 
         print(f"   => Document Parsing completed for {file_path.name}")
 
+        # --- Near-duplicate Stage ---
+        fingerprint, reused = None, None
+        if self.similarity_index:
+            fingerprint = simhash(document_text)
+            reused = self.similarity_index.find_reusable_records(fingerprint, document_text)
+        if reused:
+            return _format_records(reused[1], file_path)
+
+        # --- Learned Template Stage ---
+        templated = self.template_learner.apply(document_text) if self.template_learner else None
+        if templated:
+            return _format_records(templated[1], file_path)
+
+        # --- Budget Stage ---
+        parsed_text = document_text
+        started_at = time.monotonic()
+        can_escalate = None
+        if self.scheduler:
+            decision, allowance = self.scheduler.plan([document_text])
+            if decision == DEFER:
+                print(f"   [Budget] Over budget, deferring {file_path.name} to the next run.")
+                self.scheduler.defer(file_path)
+                return []
+            if decision == PRUNED:
+                paragraphs = [p for p in document_text.split("\n\n") if p.strip()]
+                kept = self.scheduler.prune(
+                    paragraphs, allowance - 2 * self.scheduler.call_overhead_tokens
+                )
+                if not kept:
+                    print(f"   [Budget] Nothing fits the allowance, deferring {file_path.name}.")
+                    self.scheduler.defer(file_path)
+                    return []
+                document_text = "\n\n".join(kept)
+                print(f"   [Budget] Pruned to {len(kept)}/{len(paragraphs)} paragraphs.")
+            checkpoint = self.scheduler.checkpoint(self.llm_service)
+            # Escalating re-sends the document, so it must still fit the document's allowance
+            # and deadline.
+            can_escalate = partial(
+                self._can_escalate, checkpoint, allowance, document_text, started_at
+            )
+
         # --- Use LLM to extract structured data ---
-        extraction_result = self.llm_service.extract_structured_data(document_text)
+        extraction_result = self.llm_service.extract_structured_data(
+            document_text, can_escalate=can_escalate
+        )
 
         # --- Consolidate Stage ---
-        try:
-            consolidated_result = self.llm_service.consolidate_records(extraction_result.records)
-            final_records = consolidated_result.records
-        except Exception as e:
-            print(f"   [Error] Failed to consolidate records: {e}. Returning raw data.")
+        if self.scheduler and self.scheduler.document_deadline_exceeded(started_at):
+            print("   [Budget] Document deadline exceeded, skipping consolidation.")
+            final_records = extraction_result.records
+        elif self.scheduler and not self.scheduler.within_document_budget(
+            self.llm_service, checkpoint, allowance, []
+        ):
+            print("   [Budget] Document token budget spent, skipping consolidation.")
             final_records = extraction_result.records
+        else:
+            try:
+                consolidated_result = self.llm_service.consolidate_records(
+                    extraction_result.records
+                )
+                final_records = consolidated_result.records
+                # Consolidation runs on the primary model, so it must not undo a fix made by
+                # an escalated one.
+                consolidated_problems = validate_records(final_records, document_text)
+                extracted_problems = validate_records(extraction_result.records, document_text)
+                if len(consolidated_problems) > len(extracted_problems):
+                    print(
+                        f"   [Cascade] Consolidation failed validation "
+                        f"({'; '.join(consolidated_problems[:3])}). Keeping extracted records."
+                    )
+                    final_records = extraction_result.records
+            except Exception as e:
+                print(f"   [Error] Failed to consolidate records: {e}. Returning raw data.")
+                final_records = extraction_result.records
+
+        if self.scheduler:
+            self.scheduler.settle(self.llm_service, checkpoint, [document_text])
+
+        if self.similarity_index and final_records:
+            self.similarity_index.add(
+                file_path.name,
+                fingerprint,
+                [record.model_dump(by_alias=True) for record in final_records],
+            )
+        if self.template_learner:
+            self.template_learner.learn(file_path.name, parsed_text, final_records)
 
         # --- Format the results ---
-        formatted_records = []
-        for record in final_records:
-            record_dict = record.model_dump(by_alias=True, exclude_none=True)
-            record_dict["Filename"] = file_path.name.split(".pdf")[0]
-            print(record_dict)
-            formatted_records.append(record_dict)
+        formatted_records = _format_records(final_records, file_path)
 
         print(f"   => Found {len(formatted_records)} records in {file_path.name}")
         return formatted_records
@@ -65,16 +203,32 @@ class AdvancedDataExtractor:
     It splits the document into chunks and processes each one individually.
     """
 
-    def __init__(self, chunk_size: int = 4000, chunk_overlap: int = 300):
+    def __init__(
+        self,
+        chunk_size: int = 4000,
+        chunk_overlap: int = 300,
+        scheduler: Optional[TokenBudgetScheduler] = None,
+        similarity_index: Optional[NearDuplicateIndex] = None,
+        template_learner: Optional[TemplateLearner] = None,
+    ):
         """
         Initializes the AdvancedDataExtractor.
 
         Args:
             chunk_size (int): The character count for each text chunk.
             chunk_overlap (int): The number of characters to overlap between chunks.
+            scheduler (Optional[TokenBudgetScheduler]): Enforces token and deadline budgets.
+                If None, documents are processed without limits.
+            similarity_index (Optional[NearDuplicateIndex]): Reuses extractions of
+                near-duplicate documents. If None, every document is extracted.
+            template_learner (Optional[TemplateLearner]): Learns vendor templates from LLM
+                extractions and applies them to later bills. If None, templates are not used.
         """
         self.parser = PDFParser()
         self.llm_service = LLMService()
+        self.scheduler = scheduler
+        self.similarity_index = similarity_index
+        self.template_learner = template_learner
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size, chunk_overlap=chunk_overlap
         )
@@ -98,41 +252,94 @@ class AdvancedDataExtractor:
             print(f"   [Warning] Could not parse content for {file_path.name}")
             return []
 
+        # --- Near-duplicate Stage ---
+        fingerprint, reused = None, None
+        if self.similarity_index:
+            fingerprint = simhash(document_text)
+            reused = self.similarity_index.find_reusable_records(fingerprint, document_text)
+        if reused:
+            return _format_records(reused[1], file_path)
+
+        # --- Learned Template Stage ---
+        templated = self.template_learner.apply(document_text) if self.template_learner else None
+        if templated:
+            return _format_records(templated[1], file_path)
+
         # --- Split text into chunks ---
         chunks = self.text_splitter.split_text(document_text)
         print(f"   Document split into {len(chunks)} chunks.")
 
+        # --- Budget Stage ---
+        started_at = time.monotonic()
+        if self.scheduler:
+            decision, allowance = self.scheduler.plan(chunks)
+            if decision == DEFER:
+                print(f"   [Budget] Over budget, deferring {file_path.name} to the next run.")
+                self.scheduler.defer(file_path)
+                return []
+            if decision == PRUNED:
+                overhead = self.scheduler.call_overhead_tokens
+                total_chunks = len(chunks)
+                chunks = self.scheduler.prune(chunks, allowance - overhead, overhead)
+                if not chunks:
+                    print(f"   [Budget] Nothing fits the allowance, deferring {file_path.name}.")
+                    self.scheduler.defer(file_path)
+                    return []
+                print(f"   [Budget] Pruned to {len(chunks)}/{total_chunks} most relevant chunks.")
+            checkpoint = self.scheduler.checkpoint(self.llm_service)
+
         # --- Process each chunk and collect raw results ---
         raw_records = []
         for i, chunk in enumerate(chunks):
+            if self.scheduler and self.scheduler.document_deadline_exceeded(started_at):
+                print(f"   [Budget] Document deadline exceeded after {i} chunks.")
+                break
             print(f"   Processing chunk {i + 1}/{len(chunks)}...")
             try:
-                extraction_result = self.llm_service.extract_structured_data(chunk)
+                extraction_result = self.llm_service.extract_structured_data(chunk, cascade=False)
                 raw_records.extend(extraction_result.records)
             except Exception as e:
                 print(f"   [Error] Could not process chunk {i + 1}: {e}")
 
         if not raw_records:
+            if self.scheduler:
+                self.scheduler.settle(self.llm_service, checkpoint, chunks)
             print(f"   => No records found in {file_path.name}")
             return []
 
         print(f"   Found {len(raw_records)} raw records from all chunks.")
 
         # --- Consolidate Stage ---
-        try:
-            consolidated_result = self.llm_service.consolidate_records(raw_records)
-            final_records = consolidated_result.records
-        except Exception as e:
-            print(f"   [Error] Failed to consolidate records: {e}. Returning raw data.")
+        if self.scheduler and self.scheduler.document_deadline_exceeded(started_at):
+            print("   [Budget] Document deadline exceeded, skipping consolidation.")
+            final_records = raw_records
+        elif self.scheduler and not self.scheduler.within_document_budget(
+            self.llm_service, checkpoint, allowance, []
+        ):
+            print("   [Budget] Document token budget spent, skipping consolidation.")
             final_records = raw_records
+        else:
+            try:
+                consolidated_result = self.llm_service.consolidate_records(raw_records)
+                final_records = consolidated_result.records
+            except Exception as e:
+                print(f"   [Error] Failed to consolidate records: {e}. Returning raw data.")
+                final_records = raw_records
+
+        if self.scheduler:
+            self.scheduler.settle(self.llm_service, checkpoint, chunks)
+
+        if self.similarity_index and final_records:
+            self.similarity_index.add(
+                file_path.name,
+                fingerprint,
+                [record.model_dump(by_alias=True) for record in final_records],
+            )
+        if self.template_learner:
+            self.template_learner.learn(file_path.name, document_text, final_records)
 
         # --- Final formatting ---
-        formatted_records = []
-        for record in final_records:
-            record_dict = record.model_dump(by_alias=True, exclude_none=True)
-            record_dict["Filename"] = file_path.name.split(".pdf")[0]
-            print(record_dict)
-            formatted_records.append(record_dict)
+        formatted_records = _format_records(final_records, file_path)
 
         print(
             f"   => Consolidated to {len(formatted_records)} final unique records for {file_path.name}"
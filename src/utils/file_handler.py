@@ -19,6 +19,27 @@ def get_pdf_files(directory: Path) -> List[Path]:
     return list(directory.glob("*.pdf"))
 
 
+def _to_dataframe(data: List[dict], columns: List[str]) -> pd.DataFrame:
+    """
+    Builds the CSV DataFrame, with the filename first and '-' for missing columns.
+
+    Args:
+        data (List[dict]): The records to write.
+        columns (List[str]): The exact order of columns for the CSV.
+
+    Returns:
+        pd.DataFrame: The records in the CSV column order.
+    """
+    df = pd.DataFrame(data)
+
+    final_columns = ["Filename"] + columns
+    for col in final_columns:
+        if col not in df.columns:
+            df[col] = "-"
+
+    return df[final_columns]
+
+
 def save_to_csv(data: List[dict], output_path: Path, columns: List[str]):
     """
     Saves a list of dictionaries to a CSV file.
@@ -32,20 +53,33 @@ def save_to_csv(data: List[dict], output_path: Path, columns: List[str]):
         print("Warning: No data to save.")
         return
 
-    df = pd.DataFrame(data)
-
-    final_columns = ["Filename"] + columns
-    for col in final_columns:
-        if col not in df.columns:
-            df[col] = "-"
-
-    df = df[final_columns]
+    df = _to_dataframe(data, columns)
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(output_path, index=False)
     print(f"\nSuccessfully saved extracted data to {output_path}")
 
 
+def append_to_csv(data: List[dict], output_path: Path, columns: List[str]):
+    """
+    Appends a list of dictionaries to a CSV file, writing the header if the file is new.
+
+    Args:
+        data (List[dict]): The data to append.
+        output_path (Path): The path to the output CSV file.
+        columns (List[str]): The exact order of columns for the CSV.
+    """
+    if not data:
+        return
+
+    df = _to_dataframe(data, columns)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    write_header = not output_path.exists() or output_path.stat().st_size == 0
+    df.to_csv(output_path, mode="a", header=write_header, index=False)
+    print(f"Appended {len(df)} records to {output_path}")
+
+
 if __name__ == "__main__":
     # Example usage
     from src.config import DOCUMENTS_DIR, COLUMNS_TO_EXTRACT
@@ -0,0 +1,210 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# inotify event masks (see <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifyBackend:
+    """Blocks on Linux inotify events instead of rescanning the directory."""
+
+    def __init__(self, directory: Path):
+        """
+        Initializes the inotify watch.
+
+        Args:
+            directory (Path): The directory to watch.
+
+        Raises:
+            OSError: If inotify is not available on this platform.
+        """
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not supported on this platform")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Only react once a file is fully written or atomically moved into place.
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout: float) -> List[str]:
+        """
+        Waits for files to be written or moved into the directory.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait.
+
+        Returns:
+            List[str]: Names of the files that changed.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        buffer = os.read(self.fd, 64 * 1024)
+        names, offset = [], 0
+        while offset + INOTIFY_EVENT_HEADER.size <= len(buffer):
+            _, _, _, name_length = INOTIFY_EVENT_HEADER.unpack_from(buffer, offset)
+            offset += INOTIFY_EVENT_HEADER.size
+            name = buffer[offset : offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self) -> None:
+        """Releases the inotify file descriptor."""
+        os.close(self.fd)
+
+
+class DirectoryWatcher:
+    """
+    Watches a directory for new or updated PDF files.
+    Uses inotify when available and falls back to polling file sizes and modification times.
+    """
+
+    def __init__(self, directory: Path, poll_interval: float = 2.0, use_inotify: bool = True):
+        """
+        Initializes the DirectoryWatcher.
+
+        Args:
+            directory (Path): The directory to watch.
+            poll_interval (float): Seconds between scans when polling.
+            use_inotify (bool): Whether to try inotify before falling back to polling.
+        """
+        self.directory = Path(directory)
+        self.poll_interval = poll_interval
+        self._seen: Dict[Path, Tuple[int, float]] = {}
+        # Polled files are only reported once their size/mtime is unchanged between two
+        # scans, so half-copied files are not picked up.
+        self._pending: Dict[Path, Tuple[int, float]] = {}
+        self._inotify: Optional[_InotifyBackend] = None
+
+        if use_inotify:
+            try:
+                self._inotify = _InotifyBackend(self.directory)
+                print(f"Watching {self.directory} with inotify")
+            except (OSError, AttributeError) as e:
+                print(f"inotify unavailable ({e}), polling every {poll_interval}s")
+        else:
+            print(f"Watching {self.directory} by polling every {poll_interval}s")
+
+    def _signature(self, path: Path) -> Optional[Tuple[int, float]]:
+        """
+        Gets the size and modification time of a file.
+
+        Args:
+            path (Path): The file path.
+
+        Returns:
+            Optional[Tuple[int, float]]: The (size, mtime) pair, or None if the file vanished.
+        """
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def mark_existing_as_seen(self) -> None:
+        """Records the PDFs already in the directory so only later arrivals are reported."""
+        for path in self.directory.glob("*.pdf"):
+            signature = self._signature(path)
+            if signature:
+                self._seen[path] = signature
+
+    def _accept(self, path: Path, signature: Tuple[int, float]) -> bool:
+        """
+        Records a file as seen if it is new or has changed since it was last reported.
+
+        Args:
+            path (Path): The file path.
+            signature (Tuple[int, float]): The current (size, mtime) of the file.
+
+        Returns:
+            bool: True if the file should be processed.
+        """
+        if signature[0] == 0 or self._seen.get(path) == signature:
+            return False
+        self._seen[path] = signature
+        return True
+
+    def _poll(self) -> List[Path]:
+        """
+        Scans the directory once and returns files that have settled since the last scan.
+
+        Returns:
+            List[Path]: New or updated PDF files.
+        """
+        ready = []
+        current = {}
+        for path in sorted(self.directory.glob("*.pdf")):
+            signature = self._signature(path)
+            if signature is None or self._seen.get(path) == signature:
+                continue
+            if self._pending.get(path) == signature and self._accept(path, signature):
+                ready.append(path)
+            else:
+                current[path] = signature
+        self._pending = current
+        return ready
+
+    def wait_for_new_files(self, timeout: Optional[float] = None) -> List[Path]:
+        """
+        Blocks until new or updated PDF files are available.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait, or None to wait indefinitely.
+
+        Returns:
+            List[Path]: The new or updated PDF files; empty if the timeout expired.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._inotify:
+                names = self._inotify.wait(60.0 if remaining is None else remaining)
+                ready = []
+                for name in dict.fromkeys(names):
+                    path = self.directory / name
+                    signature = self._signature(path)
+                    if (
+                        path.suffix.lower() == ".pdf"
+                        and signature
+                        and self._accept(path, signature)
+                    ):
+                        ready.append(path)
+            else:
+                ready = self._poll()
+                if not ready and (remaining is None or remaining > 0):
+                    time.sleep(
+                        self.poll_interval
+                        if remaining is None
+                        else min(self.poll_interval, remaining)
+                    )
+                    ready = self._poll()
+
+            if ready or (deadline is not None and time.monotonic() >= deadline):
+                return ready
+
+    def close(self) -> None:
+        """Stops watching the directory."""
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
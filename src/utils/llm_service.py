@@ -1,11 +1,35 @@
 import json
+import threading
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
-
-from src.schemas import DocumentExtractionResult
-from src.config import OPENAI_API_KEY, LLM_MODEL_NAME, GEMINI_API_KEY
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+from pydantic import ValidationError
+
+from src.schemas import DocumentExtractionResult, ExtractedRecord
+from src.utils.record_validator import validate_records
+from src.utils.provider_router import ProviderRouter
+from src.utils.record_stream import RecordStreamParser
+from src.config import (
+    OPENAI_API_KEY,
+    LLM_MODEL_NAME,
+    LLM_ESCALATION_MODELS,
+    LLM_SECONDARY_MODELS,
+    LLM_STREAMING_ENABLED,
+    GEMINI_API_KEY,
+    PROMPT_CACHING_ENABLED,
+    GEMINI_CACHED_CONTENT,
+    GEMINI_CACHE_TTL_SECONDS,
+)
+
+# Fraction of the explicit cache TTL after which a service-owned cache is extended.
+CACHE_REFRESH_FRACTION = 0.8
 
 
 class LLMService:
@@ -14,10 +38,9 @@ class LLMService:
     to perform structured data extraction and consolidation.
     """
 
-    EXTRACTION_PROMPT_TEMPLATE = """
-    You are an expert AI assistant for extracting structured data from utility bills.
-    Your task is to extract the specified fields from the document text provided below.
-
+    # Shared by the legacy and the cache-friendly extraction prompts so both modes extract
+    # with the same rules.
+    EXTRACTION_INSTRUCTIONS = """
     Follow these instructions carefully:
     1.  Extract all records present in the document. A single document may contain multiple billing periods or accounts.
     2.  For dates, normalize them to a standard 'YYYY-MM-DD' format.
@@ -27,7 +50,15 @@ class LLMService:
     6.  Pay attention to regional differences in number and date formats (e.g., DD/MM/YYYY vs MM/DD/YYYY, or 1,000.00 vs 1.000,00) and normalize them.
     7.  US-style number formatting is expected (e.g., 1,234.56). Use comma as thousand separator. Do not use periods as thousand separators.
     8.  Ensure that the extracted data adheres to the schema provided in the format instructions.
+    """
 
+    EXTRACTION_PROMPT_TEMPLATE = (
+        """
+    You are an expert AI assistant for extracting structured data from utility bills.
+    Your task is to extract the specified fields from the document text provided below.
+    """
+        + EXTRACTION_INSTRUCTIONS
+        + """
     Document Text:
     ---
     {document_text}
@@ -35,6 +66,27 @@ class LLMService:
 
     {format_instructions}
     """
+    )
+
+    # Cache-friendly layout of the extraction prompt: the instructions and schema form a static
+    # prefix that is byte-identical across calls, and the document text comes last.
+    EXTRACTION_SYSTEM_PROMPT = (
+        """
+    You are an expert AI assistant for extracting structured data from utility bills.
+    Your task is to extract the specified fields from the document text provided by the user.
+    """
+        + EXTRACTION_INSTRUCTIONS
+        + """
+    {format_instructions}
+    """
+    )
+
+    EXTRACTION_DOCUMENT_PROMPT = """
+    Document Text:
+    ---
+    {document_text}
+    ---
+    """
 
     CONSOLIDATION_PROMPT_TEMPLATE = """
     You are an expert data consolidation AI. You will be given a list of data records extracted from a single document.
@@ -63,53 +115,736 @@ class LLMService:
         model_name: str = LLM_MODEL_NAME,
         gemini_api_key: str = GEMINI_API_KEY,
         openai_api_key: str = OPENAI_API_KEY,
+        prompt_caching: bool = PROMPT_CACHING_ENABLED,
+        gemini_cached_content: str = GEMINI_CACHED_CONTENT,
+        escalation_models: List[str] = LLM_ESCALATION_MODELS,
+        secondary_models: List[str] = LLM_SECONDARY_MODELS,
+        streaming: bool = LLM_STREAMING_ENABLED,
     ):
         """
         Initializes the LLMService.
 
         Args:
-            model_name (str): The name of the OpenAI model to use.
+            model_name (str): The name of the primary (cheapest) model to use.
             gemini_api_key (str): The Gemini API key.
             openai_api_key (str): The OpenAI API key.
+            prompt_caching (bool): Whether to use the cache-friendly extraction prompt layout.
+            gemini_cached_content (str): An existing Gemini cached-content handle holding the
+                static extraction prefix. If empty, one is created when Gemini is used.
+            escalation_models (List[str]): Stronger models, in order, to retry an extraction
+                with when the primary model's result fails validation.
+            secondary_models (List[str]): The other provider's models, one per cascade tier
+                (primary model first). When set and that provider's key is available, calls
+                are routed across both providers and slow calls are hedged.
+            streaming (bool): Whether to stream extraction responses and parse records as
+                they complete. Routed calls are not streamed, as hedging races whole responses.
         """
         self.output_parser = PydanticOutputParser(pydantic_object=DocumentExtractionResult)
-
+        self.prompt_caching = prompt_caching
+        self.streaming = streaming
+        # Counters are shared by the extraction service's worker threads.
+        self._stats_lock = threading.Lock()
+        self.usage: Dict[str, int] = {
+            "calls": 0,
+            "input_tokens": 0,
+            "cached_input_tokens": 0,
+            "output_tokens": 0,
+        }
+
+        self.api_keys = {"gemini": gemini_api_key, "openai": openai_api_key}
         if gemini_api_key:
             print("Using Gemini LLM")
-            self.llm = ChatGoogleGenerativeAI(
-                model=model_name, google_api_key=gemini_api_key, temperature=0.0
-            )
+            self.provider, self.api_key = "gemini", gemini_api_key
         elif openai_api_key:
             print("Using OpenAI LLM as fallback")
-            self.llm = ChatOpenAI(model=model_name, openai_api_key=openai_api_key, temperature=0.0)
+            self.provider, self.api_key = "openai", openai_api_key
         else:
             raise ValueError(
                 "No API key provided for either Gemini or OpenAI.  Please set GEMINI_API_KEY or OPENAI_API_KEY in .env"
             )
 
-    def extract_structured_data(self, text_content: str) -> DocumentExtractionResult:
+        self.model_name = model_name
+        self.llm = self._create_llm(model_name)
+        self.escalation_llms = [(name, self._create_llm(name)) for name in escalation_models]
+
+        # Only Gemini-primary setups have a second provider to route to.
+        self.secondary_provider: Optional[str] = None
+        self.secondary_llms: List[Tuple[str, BaseChatModel]] = []
+        self.router: Optional[ProviderRouter] = None
+        if self.provider == "gemini" and openai_api_key and secondary_models:
+            print(f"Routing and hedging across Gemini and OpenAI ({', '.join(secondary_models)})")
+            self.secondary_provider = "openai"
+            self.secondary_llms = [
+                (name, self._create_llm(name, "openai")) for name in secondary_models
+            ]
+            self.router = ProviderRouter([self.provider, self.secondary_provider])
+
+        self.cascade_stats: Dict[str, Any] = {
+            "documents": 0,
+            "escalated": 0,
+            "latency": {name: [0.0, 0] for name in [model_name, *escalation_models]},
+        }
+
+        # Explicit caches are model-specific, so only the primary model (which handles the
+        # bulk of documents) gets one; escalation models rely on implicit prefix caching.
+        # A cache created here is owned by the service: its TTL is extended while the service
+        # runs and it is deleted by close(). A configured handle is used as is.
+        self.escalation_prompt = self._build_extraction_prompt(False)
+        self._cache_lock = threading.Lock()
+        self._set_gemini_cache(None)
+        self._gemini_cache_refresh_at = 0.0
+        self._owns_gemini_cache = False
+        if self.provider == "gemini" and prompt_caching:
+            if gemini_cached_content:
+                self._set_gemini_cache(gemini_cached_content)
+            else:
+                self._owns_gemini_cache = True
+                self._refresh_gemini_cache()
+
+    def _create_llm(self, model_name: str, provider: Optional[str] = None) -> BaseChatModel:
+        """
+        Creates a chat model client.
+
+        Args:
+            model_name (str): The name of the model.
+            provider (Optional[str]): 'gemini' or 'openai'. Defaults to the primary provider.
+
+        Returns:
+            BaseChatModel: The LangChain chat model.
+        """
+        provider = provider or self.provider
+        if provider == "gemini":
+            return ChatGoogleGenerativeAI(
+                model=model_name, google_api_key=self.api_keys["gemini"], temperature=0.0
+            )
+        return ChatOpenAI(
+            model=model_name,
+            openai_api_key=self.api_keys["openai"],
+            temperature=0.0,
+            stream_usage=True,
+        )
+
+    def _static_extraction_prefix(self) -> str:
+        """
+        Renders the static part of the cache-friendly extraction prompt.
+
+        Returns:
+            str: The instructions and schema shared by every extraction call.
+        """
+        return self.EXTRACTION_SYSTEM_PROMPT.format(
+            format_instructions=self.output_parser.get_format_instructions()
+        )
+
+    def _create_gemini_context_cache(self, model_name: str, api_key: str) -> Optional[str]:
+        """
+        Creates an explicit Gemini cached-content entry holding the static extraction prefix.
+
+        Args:
+            model_name (str): The Gemini model the cache is created for.
+            api_key (str): The Gemini API key.
+
+        Returns:
+            Optional[str]: The cache handle (``cachedContents/{id}``), or None if the cache
+                could not be created (e.g. the prefix is below the model's minimum size).
+        """
+        from google.ai import generativelanguage_v1beta as genai
+        from google.protobuf import duration_pb2
+
+        try:
+            client = genai.CacheServiceClient(client_options={"api_key": api_key})
+            cache = client.create_cached_content(
+                cached_content=genai.CachedContent(
+                    model=f"models/{model_name}",
+                    display_name="utility-bill-extraction-prefix",
+                    system_instruction=genai.Content(
+                        parts=[genai.Part(text=self._static_extraction_prefix())]
+                    ),
+                    ttl=duration_pb2.Duration(seconds=GEMINI_CACHE_TTL_SECONDS),
+                )
+            )
+            print(f"Created Gemini context cache: {cache.name}")
+            return cache.name
+        except Exception as e:
+            print(f"Could not create Gemini context cache, relying on implicit caching: {e}")
+            return None
+
+    def _extend_gemini_context_cache(self, handle: str) -> bool:
+        """
+        Resets the TTL of an explicit Gemini cache.
+
+        Args:
+            handle (str): The cache handle (``cachedContents/{id}``).
+
+        Returns:
+            bool: True if the TTL was extended, False if the cache is gone or unreachable.
+        """
+        from google.ai import generativelanguage_v1beta as genai
+        from google.protobuf import duration_pb2, field_mask_pb2
+
+        try:
+            client = genai.CacheServiceClient(client_options={"api_key": self.api_key})
+            client.update_cached_content(
+                cached_content=genai.CachedContent(
+                    name=handle, ttl=duration_pb2.Duration(seconds=GEMINI_CACHE_TTL_SECONDS)
+                ),
+                update_mask=field_mask_pb2.FieldMask(paths=["ttl"]),
+            )
+            return True
+        except Exception as e:
+            print(f"Could not extend Gemini context cache {handle}: {e}")
+            return False
+
+    @property
+    def gemini_cached_content(self) -> Optional[str]:
+        """The explicit Gemini cache handle used by the primary model, if any."""
+        return self._gemini_cache[0]
+
+    @property
+    def extraction_prompt(self) -> ChatPromptTemplate:
+        """The primary model's extraction prompt for the current cache handle."""
+        return self._gemini_cache[1]
+
+    def _set_gemini_cache(self, handle: Optional[str]) -> None:
+        """
+        Switches the primary model to (or away from) an explicit Gemini cache. The handle and
+        its prompt are swapped as one tuple, so concurrent calls never pair a handle with the
+        other layout's prompt.
+
+        Args:
+            handle (Optional[str]): The cache handle, or None to send the full prompt.
+        """
+        self._gemini_cache = (handle, self._build_extraction_prompt(bool(handle)))
+
+    def _refresh_gemini_cache(self) -> None:
+        """
+        Keeps the service-owned explicit cache alive. Once most of its TTL has passed, the TTL
+        is extended, or a new cache is created if the old one is gone (or creation failed).
+        """
+        if not self._owns_gemini_cache:
+            return
+        with self._cache_lock:
+            if time.monotonic() < self._gemini_cache_refresh_at:
+                return
+            handle = self.gemini_cached_content
+            if not (handle and self._extend_gemini_context_cache(handle)):
+                handle = self._create_gemini_context_cache(self.model_name, self.api_key)
+            self._gemini_cache_refresh_at = (
+                time.monotonic() + CACHE_REFRESH_FRACTION * GEMINI_CACHE_TTL_SECONDS
+            )
+            self._set_gemini_cache(handle)
+
+    def close(self) -> None:
+        """
+        Deletes the explicit Gemini cache created by this service so it stops being billed.
+        """
+        if not (self._owns_gemini_cache and self.gemini_cached_content):
+            return
+        from google.ai import generativelanguage_v1beta as genai
+
+        with self._cache_lock:
+            handle = self.gemini_cached_content
+            self._owns_gemini_cache = False
+            self._set_gemini_cache(None)
+        try:
+            client = genai.CacheServiceClient(client_options={"api_key": self.api_key})
+            client.delete_cached_content(name=handle)
+            print(f"Deleted Gemini context cache: {handle}")
+        except Exception as e:
+            print(f"Could not delete Gemini context cache {handle}: {e}")
+
+    def _build_extraction_prompt(self, use_cached_content: bool) -> ChatPromptTemplate:
+        """
+        Builds the extraction prompt for the configured caching mode.
+
+        Args:
+            use_cached_content (bool): Whether the static prefix is served from an explicit
+                Gemini cache and should be left out of the prompt.
+
+        Returns:
+            ChatPromptTemplate: The prompt expecting a ``document_text`` variable.
+        """
+        format_instructions = self.output_parser.get_format_instructions()
+        if not self.prompt_caching:
+            return ChatPromptTemplate.from_template(
+                template=self.EXTRACTION_PROMPT_TEMPLATE,
+                partial_variables={"format_instructions": format_instructions},
+            )
+        if use_cached_content:
+            # The static prefix already lives in the cache as the system instruction.
+            return ChatPromptTemplate.from_messages([("human", self.EXTRACTION_DOCUMENT_PROMPT)])
+        return ChatPromptTemplate.from_messages(
+            [("system", self.EXTRACTION_SYSTEM_PROMPT), ("human", self.EXTRACTION_DOCUMENT_PROMPT)]
+        ).partial(format_instructions=format_instructions)
+
+    def _record_usage(self, message: BaseMessage) -> None:
+        """
+        Accumulates token usage, splitting input tokens into cached and uncached.
+
+        Args:
+            message (BaseMessage): The raw LLM response message.
+        """
+        usage = getattr(message, "usage_metadata", None) or {}
+        details = usage.get("input_token_details") or {}
+        with self._stats_lock:
+            self.usage["calls"] += 1
+            self.usage["input_tokens"] += usage.get("input_tokens", 0) or 0
+            self.usage["output_tokens"] += usage.get("output_tokens", 0) or 0
+            self.usage["cached_input_tokens"] += details.get("cache_read", 0) or 0
+
+    def get_usage_report(self) -> Dict[str, Any]:
+        """
+        Summarises token usage across all LLM calls made by this service.
+
+        Returns:
+            Dict[str, Any]: Call count, hedged calls, cached/uncached input tokens, output
+                tokens and the cache hit ratio of input tokens. Cancelled hedge requests never
+                report usage, so token counts are a lower bound when calls were hedged.
+        """
+        input_tokens = self.usage["input_tokens"]
+        cached = self.usage["cached_input_tokens"]
+        hedged = self.router.stats.values() if self.router else []
+        return {
+            "calls": self.usage["calls"],
+            "hedged_calls": sum(stats["hedged"] for stats in hedged),
+            "input_tokens": input_tokens,
+            "cached_input_tokens": cached,
+            "uncached_input_tokens": input_tokens - cached,
+            "output_tokens": self.usage["output_tokens"],
+            "cache_hit_ratio": cached / input_tokens if input_tokens else 0.0,
+        }
+
+    def get_routing_report(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Summarises multi-provider routing and hedging.
+
+        Returns:
+            Optional[Dict[str, Dict[str, Any]]]: Per-provider request, win, error and hedge
+                counts and latency percentiles, or None if only one provider is configured.
+        """
+        return self.router.get_report() if self.router else None
+
+    def _invoke(
+        self,
+        chains: Dict[str, Runnable],
+        inputs: Dict[str, Any],
+        call_key: str,
+        cached_handle: Optional[str] = None,
+    ) -> Tuple[str, BaseMessage]:
+        """
+        Invokes a request on one provider, or across providers with routing and hedging.
+
+        Args:
+            chains (Dict[str, Runnable]): Per provider, the prompt | model chain to run.
+            inputs (Dict[str, Any]): The prompt variables.
+            call_key (str): The call type the router measures separately, e.g. the cascade
+                tier or consolidation.
+            cached_handle (Optional[str]): The explicit Gemini cache the primary provider's
+                chain is bound to. When routed, a call failing on it is retried without the
+                cache before the router sees an error.
+
+        Returns:
+            Tuple[str, BaseMessage]: The provider that answered and its response.
+        """
+        if len(chains) == 1 or self.router is None:
+            return self.provider, chains[self.provider].invoke(inputs)
+        calls = {provider: partial(chain.ainvoke, inputs) for provider, chain in chains.items()}
+        if cached_handle:
+            calls[self.provider] = partial(
+                self._ainvoke_cached, chains[self.provider], cached_handle, inputs
+            )
+        return self.router.invoke(calls, call_key)
+
+    async def _ainvoke_cached(
+        self, chain: Runnable, handle: str, inputs: Dict[str, Any]
+    ) -> BaseMessage:
+        """
+        Runs a primary-model call bound to an explicit Gemini cache, retrying with the full
+        prompt if the cache fails (e.g. expired or deleted).
+
+        Args:
+            chain (Runnable): The primary provider's chain bound to the cache.
+            handle (str): The cache handle the chain is bound to.
+            inputs (Dict[str, Any]): The prompt variables.
+
+        Returns:
+            BaseMessage: The response.
+        """
+        try:
+            return await chain.ainvoke(inputs)
+        except Exception as e:
+            self._drop_gemini_cache(handle, e)
+            return await self._extraction_chains(0)[self.provider].ainvoke(inputs)
+
+    def _tier_model_name(self, tier: int, provider: str) -> str:
+        """
+        Names the model a provider uses for a cascade tier.
+
+        Args:
+            tier (int): 0 for the primary model, otherwise the 1-based escalation index.
+            provider (str): 'gemini' or 'openai'.
+
+        Returns:
+            str: The model name.
+        """
+        if provider != self.provider:
+            return self.secondary_llms[tier][0]
+        return self.model_name if tier == 0 else self.escalation_llms[tier - 1][0]
+
+    def get_cascade_report(self) -> Dict[str, Any]:
+        """
+        Summarises how often documents were escalated to stronger models and the latency
+        saved compared to running every document on the strongest model.
+
+        Returns:
+            Dict[str, Any]: Document and escalation counts, escalation rate, mean latency per
+                model and the estimated latency saved in seconds (None until the strongest
+                model has been measured).
+        """
+        documents = self.cascade_stats["documents"]
+        escalated = self.cascade_stats["escalated"]
+        latency = self.cascade_stats["latency"]
+        mean_latency = {name: total / calls for name, (total, calls) in latency.items() if calls}
+        total_time = sum(total for total, _ in latency.values())
+
+        strongest = self.escalation_llms[-1][0] if self.escalation_llms else self.model_name
+        latency_saved = None
+        if strongest in mean_latency:
+            latency_saved = documents * mean_latency[strongest] - total_time
+
+        return {
+            "documents": documents,
+            "escalated": escalated,
+            "escalation_rate": escalated / documents if documents else 0.0,
+            "mean_latency_by_model": mean_latency,
+            "latency_saved_seconds": latency_saved,
+        }
+
+    def extract_structured_data(
+        self,
+        text_content: str,
+        cascade: bool = True,
+        can_escalate: Optional[Callable[[], bool]] = None,
+    ) -> DocumentExtractionResult:
         """
         Extracts structured data from text content using the LLM.
 
+        The primary model runs first; if its result fails local validation (missing fields,
+        implausible dates or amounts, values not found in the text) the document is retried
+        with each escalation model in turn. The result with the fewest problems is returned.
+
         Args:
             text_content (str): The text content of a document.
+            cascade (bool): Whether to validate and escalate. Disable for partial inputs such
+                as chunks, which cannot be validated on their own.
+            can_escalate (Optional[Callable[[], bool]]): Called before each escalation; when it
+                returns False the best result so far is kept, e.g. once the document's token
+                budget is spent.
 
         Returns:
             DocumentExtractionResult: A Pydantic object containing the extracted records.
         """
-        prompt = ChatPromptTemplate.from_template(
-            template=self.EXTRACTION_PROMPT_TEMPLATE,
-            partial_variables={"format_instructions": self.output_parser.get_format_instructions()},
+        tiers = [(self.model_name, self.llm)]
+        if cascade:
+            tiers += self.escalation_llms
+        if len(tiers) == 1:
+            return self._run_extraction(0, text_content)[1]
+
+        with self._stats_lock:
+            self.cascade_stats["documents"] += 1
+        best_result, best_problems = None, None
+        for tier, (name, _) in enumerate(tiers):
+            start = time.perf_counter()
+            # With routing, the tier may have been answered by the other provider's model.
+            model, result = self._run_extraction(tier, text_content)
+            with self._stats_lock:
+                latency = self.cascade_stats["latency"].setdefault(model, [0.0, 0])
+                latency[0] += time.perf_counter() - start
+                latency[1] += 1
+
+            problems = validate_records(result.records, text_content)
+            if best_problems is None or len(problems) <= len(best_problems):
+                best_result, best_problems = result, problems
+            if not problems:
+                break
+            if tier + 1 < len(tiers):
+                if can_escalate is not None and not can_escalate():
+                    print(
+                        f"   [Cascade] {name} failed validation but the document budget does "
+                        f"not allow escalating to {tiers[tier + 1][0]}."
+                    )
+                    break
+                if tier == 0:
+                    with self._stats_lock:
+                        self.cascade_stats["escalated"] += 1
+                print(
+                    f"   [Cascade] {name} failed validation ({'; '.join(problems[:3])}). "
+                    f"Escalating to {tiers[tier + 1][0]}."
+                )
+        return best_result
+
+    def stream_structured_data(self, text_content: str) -> Iterator[ExtractedRecord]:
+        """
+        Extracts records with the primary model, yielding each one as soon as its JSON object
+        is complete. Records completed before a truncated or malformed tail are still yielded.
+        There is no cascade or hedging; with two providers the router picks which one streams
+        and records the outcome. The extraction pipeline does not use this generator: it
+        validates and consolidates whole results, so ``_call_extraction`` collects the stream.
+
+        Args:
+            text_content (str): The text content of a document.
+
+        Yields:
+            ExtractedRecord: Each schema-valid record, in response order.
+        """
+        self._refresh_gemini_cache()
+        gemini_cache = self._gemini_cache
+        chains = self._extraction_chains(0, gemini_cache)
+        provider = (
+            self.router.order(list(chains), "extraction:0")[0] if self.router else self.provider
+        )
+        inputs = {"document_text": text_content}
+        try:
+            yield from self._stream_routed(provider, chains[provider], inputs)
+        except Exception as e:
+            if provider != self.provider or not gemini_cache[0]:
+                raise
+            self._drop_gemini_cache(gemini_cache[0], e)
+            yield from self._stream_routed(provider, self._extraction_chains(0)[provider], inputs)
+
+    def _stream_routed(
+        self, provider: str, chain: Runnable, inputs: Dict[str, Any]
+    ) -> Iterator[ExtractedRecord]:
+        """
+        Streams records from a provider and records the call's outcome in the router. Time
+        spent by the caller between records is not counted as provider latency.
+
+        Args:
+            provider (str): The provider serving the call.
+            chain (Runnable): The provider's prompt | model chain.
+            inputs (Dict[str, Any]): The prompt variables.
+
+        Yields:
+            ExtractedRecord: Each schema-valid record as soon as it closes.
+        """
+        if self.router is None:
+            yield from self._stream_records(chain, inputs)
+            return
+        latency, resumed_at = 0.0, time.monotonic()
+        try:
+            for record in self._stream_records(chain, inputs):
+                latency += time.monotonic() - resumed_at
+                yield record
+                resumed_at = time.monotonic()
+        except Exception:
+            self.router.record(provider, latency, ok=False, key="extraction:0")
+            raise
+        self.router.record(
+            provider, latency + time.monotonic() - resumed_at, ok=True, key="extraction:0"
+        )
+
+    @staticmethod
+    def _message_text(message: BaseMessage) -> str:
+        """
+        Extracts the text of a message or message chunk.
+
+        Args:
+            message (BaseMessage): The LLM response (or a streamed piece of it).
+
+        Returns:
+            str: The concatenated text content.
+        """
+        if isinstance(message.content, str):
+            return message.content
+        return "".join(
+            part if isinstance(part, str) else part.get("text", "") for part in message.content
         )
 
-        chain = prompt | self.llm | self.output_parser
+    @staticmethod
+    def _to_record(raw_record: Dict[str, Any]) -> Optional[ExtractedRecord]:
+        """
+        Validates a parsed record object against the schema.
 
+        Args:
+            raw_record (Dict[str, Any]): A record object from the response.
+
+        Returns:
+            Optional[ExtractedRecord]: The record, or None if it does not fit the schema.
+        """
         try:
-            response = chain.invoke({"document_text": text_content})
-            return response
+            return ExtractedRecord.model_validate(raw_record)
+        except ValidationError as e:
+            print(f"   [Stream] Dropping record that does not match the schema: {e}")
+            return None
+
+    def _stream_records(self, chain: Runnable, inputs: Dict[str, Any]) -> Iterator[ExtractedRecord]:
+        """
+        Streams a chain and yields records as the ``records`` array is parsed incrementally.
+
+        Args:
+            chain (Runnable): The prompt | model chain.
+            inputs (Dict[str, Any]): The prompt variables.
+
+        Yields:
+            ExtractedRecord: Each schema-valid record as soon as it closes.
+
+        Raises:
+            Exception: The call's error if it fails before any record is complete.
+        """
+        parser = RecordStreamParser()
+        response = None
+        yielded = 0
+        try:
+            for chunk in chain.stream(inputs):
+                response = chunk if response is None else response + chunk
+                for raw_record in parser.feed(self._message_text(chunk)):
+                    record = self._to_record(raw_record)
+                    if record is not None:
+                        yielded += 1
+                        yield record
+            if not parser.finished:
+                print(
+                    f"   [Stream] Response ended before the records array closed, "
+                    f"keeping {parser.records_parsed} complete records."
+                )
         except Exception as e:
-            print(f"An error occurred during LLM invocation: {e}")
-            return DocumentExtractionResult(records=[])
+            if not yielded:
+                raise
+            print(f"   [Stream] Response interrupted after {yielded} records: {e}")
+        finally:
+            if response is not None:
+                self._record_usage(response)
+
+    def _parse_response(self, message: BaseMessage) -> DocumentExtractionResult:
+        """
+        Parses a complete response, salvaging the complete records of a malformed one.
+
+        Args:
+            message (BaseMessage): The LLM response.
+
+        Returns:
+            DocumentExtractionResult: The parsed records.
+
+        Raises:
+            OutputParserException: If the response is malformed and no record can be salvaged.
+        """
+        try:
+            return self.output_parser.invoke(message)
+        except Exception as e:
+            raw_records = RecordStreamParser().feed(self._message_text(message))
+            records = [r for r in map(self._to_record, raw_records) if r is not None]
+            if not records:
+                raise
+            print(
+                f"   [Parser] Malformed response ({type(e).__name__}), "
+                f"salvaged {len(records)} complete records."
+            )
+            return DocumentExtractionResult(records=records)
+
+    def _extraction_chains(
+        self, tier: int, gemini_cache: Optional[Tuple[Optional[str], ChatPromptTemplate]] = None
+    ) -> Dict[str, Runnable]:
+        """
+        Builds the extraction chain of each provider for a cascade tier.
+
+        Args:
+            tier (int): 0 for the primary model, otherwise the 1-based escalation index.
+            gemini_cache (Optional[Tuple[Optional[str], ChatPromptTemplate]]): A snapshot of
+                the cache handle and its prompt for the primary model. Defaults to the
+                current one.
+
+        Returns:
+            Dict[str, Runnable]: Per provider, the prompt | model chain.
+        """
+        if tier == 0:
+            llm, (handle, prompt) = self.llm, gemini_cache or self._gemini_cache
+            if self.prompt_caching and handle:
+                llm = self.llm.bind(cached_content=handle)
+        else:
+            llm, prompt = self.escalation_llms[tier - 1][1], self.escalation_prompt
+
+        chains = {self.provider: prompt | llm}
+        if tier < len(self.secondary_llms):
+            # The explicit Gemini cache does not apply to the other provider.
+            chains[self.secondary_provider] = self.escalation_prompt | self.secondary_llms[tier][1]
+        return chains
+
+    def _drop_gemini_cache(self, handle: str, error: Exception) -> None:
+        """
+        Stops using an explicit Gemini cache that failed (e.g. expired or deleted), so calls
+        send the full prompt until the cache is refreshed. A cache that another thread has
+        already replaced is left alone.
+
+        Args:
+            handle (str): The cache handle the failed call used.
+            error (Exception): The error raised by the call that used the cache.
+        """
+        print(
+            f"   [Cache] Call with {handle} failed ({error}), retrying without the explicit cache."
+        )
+        with self._cache_lock:
+            if self.gemini_cached_content == handle:
+                self._set_gemini_cache(None)
+
+    def _call_extraction(
+        self,
+        tier: int,
+        text_content: str,
+        gemini_cache: Optional[Tuple[Optional[str], ChatPromptTemplate]] = None,
+    ) -> Tuple[str, DocumentExtractionResult]:
+        """
+        Makes one extraction call, streamed or routed, raising on failure.
+
+        Args:
+            tier (int): 0 for the primary model, otherwise the 1-based escalation index.
+            text_content (str): The text content of a document.
+            gemini_cache (Optional[Tuple[Optional[str], ChatPromptTemplate]]): A snapshot of
+                the cache handle and its prompt. Defaults to the current one.
+
+        Returns:
+            Tuple[str, DocumentExtractionResult]: The model that answered and the extracted
+                records.
+        """
+        gemini_cache = gemini_cache or self._gemini_cache
+        chains = self._extraction_chains(tier, gemini_cache)
+        inputs = {"document_text": text_content}
+        if self.streaming and len(chains) == 1:
+            records = list(self._stream_records(chains[self.provider], inputs))
+            result = DocumentExtractionResult(records=records)
+            return self._tier_model_name(tier, self.provider), result
+
+        cached_handle = gemini_cache[0] if tier == 0 else None
+        provider, message = self._invoke(chains, inputs, f"extraction:{tier}", cached_handle)
+        self._record_usage(message)
+        return self._tier_model_name(tier, provider), self._parse_response(message)
+
+    def _run_extraction(self, tier: int, text_content: str) -> Tuple[str, DocumentExtractionResult]:
+        """
+        Runs a single extraction call against one model of the cascade. A primary-model call
+        that fails while bound to the explicit Gemini cache is retried without it.
+
+        Args:
+            tier (int): 0 for the primary model, otherwise the 1-based escalation index.
+            text_content (str): The text content of a document.
+
+        Returns:
+            Tuple[str, DocumentExtractionResult]: The model that answered (the primary
+                provider's model on failure) and the extracted records, or none on failure.
+        """
+        if tier == 0:
+            self._refresh_gemini_cache()
+        gemini_cache = self._gemini_cache
+        try:
+            return self._call_extraction(tier, text_content, gemini_cache)
+        except Exception as e:
+            error = e
+            if tier == 0 and gemini_cache[0]:
+                self._drop_gemini_cache(gemini_cache[0], e)
+                try:
+                    return self._call_extraction(tier, text_content)
+                except Exception as retry_error:
+                    error = retry_error
+            print(f"An error occurred during LLM invocation: {error}")
+            return self._tier_model_name(tier, self.provider), DocumentExtractionResult(records=[])
 
     def consolidate_records(self, records: DocumentExtractionResult) -> DocumentExtractionResult:
         """
@@ -132,12 +867,17 @@ class LLMService:
             partial_variables={"format_instructions": self.output_parser.get_format_instructions()},
         )
 
-        chain = prompt | self.llm | self.output_parser
+        chains = {self.provider: prompt | self.llm}
+        if self.secondary_llms:
+            chains[self.secondary_provider] = prompt | self.secondary_llms[0][1]
 
         print("   Calling LLM to consolidate results...")
         try:
-            response = chain.invoke({"raw_records_json": raw_records_json})
-            return response
+            _, message = self._invoke(
+                chains, {"raw_records_json": raw_records_json}, "consolidation"
+            )
+            self._record_usage(message)
+            return self._parse_response(message)
         except Exception as e:
             print(f"An error occurred during LLM invocation: {e}")
             return DocumentExtractionResult(records=[])
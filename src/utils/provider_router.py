@@ -0,0 +1,309 @@
+import asyncio
+import math
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.config import (
+    HEDGE_LATENCY_PERCENTILE,
+    HEDGE_DEFAULT_DELAY_SECONDS,
+    ROUTER_MIN_SAMPLES,
+    ROUTER_LATENCY_WINDOW,
+)
+
+# Smoothing factor of the per-provider error rate (weight of the latest call).
+ERROR_RATE_ALPHA = 0.1
+# Lowest routing weight factor, so a recovering provider still receives some traffic.
+MIN_SUCCESS_WEIGHT = 0.05
+# Call type used when the caller does not name one.
+DEFAULT_CALL_KEY = "default"
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """
+    Computes a nearest-rank percentile.
+
+    Args:
+        values (List[float]): The samples.
+        q (float): The percentile as a fraction, e.g. 0.95.
+
+    Returns:
+        float: The smallest sample that at least ``q`` of the samples do not exceed.
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class ProviderRouter:
+    """
+    Routes LLM calls across providers by measured latency and error rate, and hedges slow
+    calls: if the chosen provider has not answered by its p95 latency, the same request is
+    sent to the next provider, the first successful response wins and the other is cancelled.
+    Calls run on a dedicated event loop thread so losing requests can actually be cancelled.
+    Latency and error rate are tracked per call type (e.g. each cascade tier), since the
+    models and prompts behind different call types take very different times.
+    """
+
+    def __init__(
+        self,
+        providers: List[str],
+        hedge_percentile: float = HEDGE_LATENCY_PERCENTILE,
+        default_hedge_delay: float = HEDGE_DEFAULT_DELAY_SECONDS,
+        min_samples: int = ROUTER_MIN_SAMPLES,
+        latency_window: int = ROUTER_LATENCY_WINDOW,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Initializes the ProviderRouter.
+
+        Args:
+            providers (List[str]): The provider names, e.g. ['gemini', 'openai'].
+            hedge_percentile (float): Latency percentile after which a call is hedged.
+            default_hedge_delay (float): Hedge delay in seconds before a provider has
+                ``min_samples`` measurements.
+            min_samples (int): Measurements needed before the percentile is trusted.
+            latency_window (int): Number of recent latencies kept per provider.
+            rng (Optional[random.Random]): Random source for weighted routing.
+        """
+        self.providers = providers
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_samples = min_samples
+        self.rng = rng or random.Random()
+        self.latency_window = latency_window
+        self.stats: Dict[str, Dict[str, Any]] = {
+            provider: {"requests": 0, "errors": 0, "wins": 0, "hedged": 0} for provider in providers
+        }
+        self.call_stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def measurements(self, provider: str, key: str = DEFAULT_CALL_KEY) -> Dict[str, Any]:
+        """
+        Returns a provider's latency window and error rate for one call type.
+
+        Args:
+            provider (str): The provider.
+            key (str): The call type, e.g. 'extraction:0' or 'consolidation'.
+
+        Returns:
+            Dict[str, Any]: The recent latencies, error count and smoothed error rate.
+        """
+        # setdefault keeps concurrent first lookups from replacing each other's entry.
+        return self.call_stats.setdefault(key, {}).setdefault(
+            provider,
+            {"latencies": deque(maxlen=self.latency_window), "errors": 0, "error_rate": 0.0},
+        )
+
+    def hedge_delay(self, provider: str, key: str = DEFAULT_CALL_KEY) -> float:
+        """
+        Returns how long to wait on a provider before hedging.
+
+        Args:
+            provider (str): The provider handling the call.
+            key (str): The call type.
+
+        Returns:
+            float: The provider's latency percentile for the call type in seconds, or the
+                default delay.
+        """
+        latencies = self.measurements(provider, key)["latencies"]
+        if len(latencies) < self.min_samples:
+            return self.default_hedge_delay
+        return _percentile(list(latencies), self.hedge_percentile)
+
+    def order(self, providers: List[str], key: str = DEFAULT_CALL_KEY) -> List[str]:
+        """
+        Orders providers for a call. Untried providers go first so every provider gets
+        measured; otherwise the first provider is drawn with probability proportional to its
+        success rate divided by its median latency, and the rest follow by that same score.
+        A provider without successful calls is assumed to take the default hedge delay.
+
+        Args:
+            providers (List[str]): The providers able to serve the call.
+            key (str): The call type whose measurements are used.
+
+        Returns:
+            List[str]: The providers in the order they should be tried.
+        """
+        stats = {p: self.measurements(p, key) for p in providers}
+        unmeasured = [p for p in providers if not stats[p]["latencies"] and not stats[p]["errors"]]
+        if unmeasured:
+            return unmeasured + [p for p in providers if p not in unmeasured]
+
+        weights = {}
+        for p in providers:
+            latencies = stats[p]["latencies"]
+            latency = statistics.median(latencies) if latencies else self.default_hedge_delay
+            weights[p] = max(1.0 - stats[p]["error_rate"], MIN_SUCCESS_WEIGHT) / max(latency, 1e-3)
+        first = self.rng.choices(providers, weights=[weights[p] for p in providers])[0]
+        rest = sorted((p for p in providers if p != first), key=weights.get, reverse=True)
+        return [first, *rest]
+
+    def _record(self, provider: str, key: str, latency: float, ok: bool) -> None:
+        """
+        Updates a provider's latency window and error rate for a call type. Only successful
+        calls are timed: a provider that fails fast must not look fast.
+
+        Args:
+            provider (str): The provider.
+            key (str): The call type.
+            latency (float): Seconds the call took.
+            ok (bool): Whether the call succeeded.
+        """
+        stats = self.measurements(provider, key)
+        if ok:
+            stats["latencies"].append(latency)
+        else:
+            stats["errors"] += 1
+            self.stats[provider]["errors"] += 1
+        stats["error_rate"] += ERROR_RATE_ALPHA * ((0.0 if ok else 1.0) - stats["error_rate"])
+
+    def record(self, provider: str, latency: float, ok: bool, key: str = DEFAULT_CALL_KEY) -> None:
+        """
+        Records the outcome of a call made outside ``invoke``, e.g. a streamed response. The
+        update runs on the router's event loop thread, like those made by ``invoke``.
+
+        Args:
+            provider (str): The provider that served the call.
+            latency (float): Seconds the call took.
+            ok (bool): Whether the call succeeded.
+            key (str): The call type.
+        """
+
+        def update() -> None:
+            self.stats[provider]["requests"] += 1
+            self.stats[provider]["wins"] += int(ok)
+            self._record(provider, key, latency, ok)
+
+        self._ensure_loop().call_soon_threadsafe(update)
+
+    async def _race(
+        self, calls: Dict[str, Callable[[], Awaitable[Any]]], key: str
+    ) -> Tuple[str, Any]:
+        """
+        Runs a call on the preferred provider, hedging or failing over to the others.
+
+        Args:
+            calls (Dict[str, Callable[[], Awaitable[Any]]]): Per provider, a function
+                starting the request.
+            key (str): The call type.
+
+        Returns:
+            Tuple[str, Any]: The winning provider and its response.
+        """
+        order = self.order(list(calls), key)
+        tasks: Dict[asyncio.Future, Tuple[str, float]] = {}
+
+        def launch(provider: str) -> None:
+            self.stats[provider]["requests"] += 1
+            tasks[asyncio.ensure_future(calls[provider]())] = (provider, time.monotonic())
+
+        launch(order[0])
+        hedge_at = time.monotonic() + self.hedge_delay(order[0], key)
+        pending = set(tasks)
+        last_error: Optional[BaseException] = None
+
+        while pending:
+            timeout = None
+            if len(tasks) < len(order):
+                timeout = max(0.0, hedge_at - time.monotonic())
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                self.stats[order[0]]["hedged"] += 1
+                print(f"   [Router] {order[0]} is slow, hedging with {order[len(tasks)]}.")
+                launch(order[len(tasks)])
+                pending = {task for task in tasks if not task.done()}
+                continue
+
+            for task in done:
+                provider, started_at = tasks[task]
+                error = task.exception()
+                self._record(provider, key, time.monotonic() - started_at, ok=error is None)
+                if error is None:
+                    self.stats[provider]["wins"] += 1
+                    for loser in pending:
+                        # The loser took at least this long; keep that in its latency window.
+                        loser_provider, loser_started_at = tasks[loser]
+                        self.measurements(loser_provider, key)["latencies"].append(
+                            time.monotonic() - loser_started_at
+                        )
+                        loser.cancel()
+                    return provider, task.result()
+                print(f"   [Router] {provider} failed: {error}")
+                last_error = error
+
+            if not pending and len(tasks) < len(order):
+                launch(order[len(tasks)])
+                pending = {task for task in tasks if not task.done()}
+
+        raise last_error
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Starts the router's event loop thread on first use.
+
+        Returns:
+            asyncio.AbstractEventLoop: The running loop that executes provider calls.
+        """
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="provider-router", daemon=True
+                ).start()
+            return self._loop
+
+    def invoke(
+        self, calls: Dict[str, Callable[[], Awaitable[Any]]], key: str = DEFAULT_CALL_KEY
+    ) -> Tuple[str, Any]:
+        """
+        Runs a request with routing and hedging, blocking until a provider answers.
+
+        Args:
+            calls (Dict[str, Callable[[], Awaitable[Any]]]): Per provider, a function
+                starting the request, e.g. ``functools.partial(chain.ainvoke, inputs)``.
+            key (str): The call type, so that routing and hedging use the latencies of
+                comparable calls.
+
+        Returns:
+            Tuple[str, Any]: The winning provider and its response.
+
+        Raises:
+            Exception: The last provider error if every provider failed.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._race(calls, key), self._ensure_loop())
+        return future.result()
+
+    def get_report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarises routing per provider.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: For each provider, requests, wins, errors and hedges
+                fired, and per call type the error rate and p50/p95/p99 latency in seconds
+                (None until measured).
+        """
+        report = {}
+        for provider, stats in self.stats.items():
+            calls = {}
+            for key, by_provider in self.call_stats.items():
+                if provider not in by_provider:
+                    continue
+                latencies = list(by_provider[provider]["latencies"])
+                calls[key] = {
+                    "error_rate": by_provider[provider]["error_rate"],
+                    **{
+                        f"p{int(q * 100)}_latency": (
+                            _percentile(latencies, q) if latencies else None
+                        )
+                        for q in (0.5, 0.95, 0.99)
+                    },
+                }
+            report[provider] = {**stats, "calls": calls}
+        return report
@@ -0,0 +1,77 @@
+import json
+import re
+from typing import Any, Dict, List
+
+RECORDS_ARRAY_PATTERN = re.compile(r'"records"\s*:\s*\[')
+
+
+class RecordStreamParser:
+    """
+    Incrementally parses the ``records`` array of an extraction response as tokens arrive.
+    Each record object is returned as soon as its closing brace is received, so complete
+    records are available before the response ends and survive a truncated or malformed tail.
+    """
+
+    def __init__(self):
+        """Initializes an empty RecordStreamParser."""
+        self.buffer = ""
+        self.position = 0
+        self.in_array = False
+        self.finished = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.object_start = 0
+        self.records_parsed = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Consumes the next piece of the response.
+
+        Args:
+            text (str): The newly received text.
+
+        Returns:
+            List[Dict[str, Any]]: The record objects completed by this piece.
+        """
+        self.buffer += text
+        if not self.in_array:
+            # Code fences or preamble before the JSON are skipped until the array opens.
+            match = RECORDS_ARRAY_PATTERN.search(self.buffer)
+            if match is None:
+                return []
+            self.in_array = True
+            self.position = match.end()
+
+        completed = []
+        while self.position < len(self.buffer) and not self.finished:
+            char = self.buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == "{":
+                if self.depth == 0:
+                    self.object_start = self.position
+                self.depth += 1
+            elif char == "}" and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    raw = self.buffer[self.object_start : self.position + 1]
+                    try:
+                        record = json.loads(raw)
+                    except ValueError as e:
+                        print(f"   [Stream] Skipping malformed record {raw[:80]!r}: {e}")
+                    else:
+                        if isinstance(record, dict):
+                            completed.append(record)
+                            self.records_parsed += 1
+            elif char == "]" and self.depth == 0:
+                self.finished = True
+            self.position += 1
+        return completed
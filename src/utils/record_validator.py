@@ -0,0 +1,260 @@
+import re
+from datetime import date, datetime
+from typing import List, Optional, Set
+
+from src.schemas import ExtractedRecord
+
+MISSING = "-"
+EARLIEST_PLAUSIBLE_YEAR = 1990
+NUMBER_TOKEN_PATTERN = re.compile(r"\d[\d.,]*")
+US_AMOUNT_PATTERN = re.compile(r"^\d{1,3}(,\d{3})*(\.\d+)?$|^\d+(\.\d+)?$")
+DATE_TOKEN_PATTERN = re.compile(
+    r"\d{1,4}[/.-]\d{1,2}[/.-]\d{2,4}"
+    r"|[A-Za-z]{3,9}\.? \d{1,2},? \d{4}"
+    r"|\d{1,2} [A-Za-z]{3,9}\.?,? \d{4}"
+)
+DATE_FORMATS = (
+    "%m/%d/%y",
+    "%m/%d/%Y",
+    "%d/%m/%y",
+    "%d/%m/%Y",
+    "%Y-%m-%d",
+    "%d.%m.%Y",
+    "%d-%m-%Y",
+    "%b %d, %Y",
+    "%B %d, %Y",
+    "%b %d %Y",
+    "%B %d %Y",
+    "%d %b %Y",
+    "%d %B %Y",
+)
+
+
+def _is_missing(value: Optional[str]) -> bool:
+    """
+    Checks whether a field value is absent.
+
+    Args:
+        value (Optional[str]): The field value.
+
+    Returns:
+        bool: True if the value is None, empty or a hyphen placeholder.
+    """
+    return value is None or value.strip() in ("", MISSING)
+
+
+def _parse_date(value: str) -> Optional[date]:
+    """
+    Parses a 'YYYY-MM-DD' date.
+
+    Args:
+        value (str): The date string.
+
+    Returns:
+        Optional[date]: The parsed date, or None if it is not a valid ISO date.
+    """
+    try:
+        return date.fromisoformat(value.strip())
+    except ValueError:
+        return None
+
+
+def parse_date_token(token: str, date_format: str) -> Optional[date]:
+    """
+    Parses a date token with a specific format.
+
+    Args:
+        token (str): The date as written in the document.
+        date_format (str): A ``strptime`` format.
+
+    Returns:
+        Optional[date]: The parsed date, or None if the token does not match.
+    """
+    try:
+        return datetime.strptime(" ".join(token.replace(".", "").split()), date_format).date()
+    except ValueError:
+        try:
+            return datetime.strptime(" ".join(token.split()), date_format).date()
+        except ValueError:
+            return None
+
+
+def number_forms(token: str) -> Set[str]:
+    """
+    Normalises a number to separator-free digit strings so that '1,234.50', '1.234,50'
+    and '1234.5' compare equal regardless of regional formatting.
+
+    Args:
+        token (str): A number as written in a record or the source text.
+
+    Returns:
+        Set[str]: The digit strings the number may be written as.
+    """
+    token = token.strip().rstrip(".,")
+    digits = re.sub(r"\D", "", token)
+    if not digits:
+        return set()
+    forms = {digits}
+    match = re.match(r"^(.*)[.,](\d{1,2})$", token)
+    if match:
+        integer_part = re.sub(r"\D", "", match.group(1))
+        fraction = match.group(2).rstrip("0")
+        forms.add(integer_part + fraction)
+        if not fraction:
+            forms.add(integer_part)
+    return forms
+
+
+def _parse_amount(value: str) -> Optional[float]:
+    """
+    Parses a US-formatted number such as '1,234.56'.
+
+    Args:
+        value (str): The number string.
+
+    Returns:
+        Optional[float]: The parsed value, or None if it is not a US-formatted number.
+    """
+    value = value.strip()
+    if not US_AMOUNT_PATTERN.match(value):
+        return None
+    return float(value.replace(",", ""))
+
+
+def source_number_forms(source_text: str) -> Set[str]:
+    """
+    Collects the normalised forms of every number appearing in a document.
+
+    Args:
+        source_text (str): The parsed document text.
+
+    Returns:
+        Set[str]: The union of digit-string forms of all numbers in the text.
+    """
+    forms: Set[str] = set()
+    for token in NUMBER_TOKEN_PATTERN.findall(source_text):
+        forms |= number_forms(token)
+    return forms
+
+
+def source_dates(source_text: str) -> Set[date]:
+    """
+    Collects every date a document may contain, under each format its tokens parse with.
+
+    Args:
+        source_text (str): The parsed document text.
+
+    Returns:
+        Set[date]: The dates written in the text.
+    """
+    dates: Set[date] = set()
+    for token in DATE_TOKEN_PATTERN.findall(source_text):
+        for date_format in DATE_FORMATS:
+            parsed = parse_date_token(token, date_format)
+            if parsed is not None:
+                dates.add(parsed)
+    return dates
+
+
+def validate_record(
+    record: ExtractedRecord, source_text: str, source_numbers: Optional[Set[str]] = None
+) -> List[str]:
+    """
+    Checks a single extracted record for missing fields, implausible values and
+    values that cannot be found in the source document.
+
+    Args:
+        record (ExtractedRecord): The record to validate.
+        source_text (str): The document text the record was extracted from.
+        source_numbers (Optional[Set[str]]): Pre-computed ``source_number_forms`` of the text.
+
+    Returns:
+        List[str]: Human-readable problems; empty if the record looks valid.
+    """
+    if source_numbers is None:
+        source_numbers = source_number_forms(source_text)
+    problems = []
+
+    if _is_missing(record.account_number):
+        problems.append("missing account number")
+    else:
+        compact_source = re.sub(r"[^0-9A-Za-z]", "", source_text).lower()
+        compact_account = re.sub(r"[^0-9A-Za-z]", "", record.account_number).lower()
+        if compact_account not in compact_source:
+            problems.append(f"account number {record.account_number!r} not in source")
+
+    if _is_missing(record.cost):
+        problems.append("missing cost")
+
+    dates = {}
+    for name, value in (("from date", record.from_date), ("to date", record.to_date)):
+        if _is_missing(value):
+            continue
+        parsed = _parse_date(value)
+        if parsed is None:
+            problems.append(f"{name} {value!r} is not YYYY-MM-DD")
+        elif not EARLIEST_PLAUSIBLE_YEAR <= parsed.year <= date.today().year + 1:
+            problems.append(f"{name} {value!r} is implausible")
+        else:
+            dates[name] = parsed
+    if len(dates) == 2 and dates["from date"] > dates["to date"]:
+        problems.append("from date is after to date")
+
+    for name, value in (("usage", record.usage), ("cost", record.cost)):
+        if _is_missing(value):
+            continue
+        amount = _parse_amount(value)
+        if amount is None:
+            problems.append(f"{name} {value!r} is not a US-formatted number")
+        elif not number_forms(value) & source_numbers:
+            problems.append(f"{name} {value!r} not in source")
+
+    return problems
+
+
+def validate_records(records: List[ExtractedRecord], source_text: str) -> List[str]:
+    """
+    Validates all records extracted from one document.
+
+    Args:
+        records (List[ExtractedRecord]): The extracted records.
+        source_text (str): The document text the records were extracted from.
+
+    Returns:
+        List[str]: Problems found across all records; empty if the extraction looks valid.
+    """
+    if not records:
+        return ["no records extracted"]
+
+    source_numbers = source_number_forms(source_text)
+    problems = []
+    for i, record in enumerate(records):
+        problems.extend(
+            f"record {i + 1}: {problem}"
+            for problem in validate_record(record, source_text, source_numbers)
+        )
+    return problems
+
+
+def validate_dates_in_source(records: List[ExtractedRecord], source_text: str) -> List[str]:
+    """
+    Checks that each record's from and to dates are written in the document. Not part of
+    ``validate_records``, as an LLM may legitimately infer a date; used where records are
+    carried over from another document.
+
+    Args:
+        records (List[ExtractedRecord]): The records to check.
+        source_text (str): The document text.
+
+    Returns:
+        List[str]: Dates not found in the text; empty if every date is present.
+    """
+    dates = source_dates(source_text)
+    problems = []
+    for i, record in enumerate(records):
+        for name, value in (("from date", record.from_date), ("to date", record.to_date)):
+            if _is_missing(value):
+                continue
+            if _parse_date(value) not in dates:
+                problems.append(f"record {i + 1}: {name} {value!r} not in source")
+    return problems
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.config import SIMILARITY_INDEX_PATH, NEAR_DUPLICATE_MAX_DISTANCE
+from src.schemas import ExtractedRecord
+from src.utils.record_validator import validate_dates_in_source, validate_records
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3
+
+
+def _shingles(text: str) -> List[str]:
+    """
+    Splits text into overlapping word n-grams.
+
+    Args:
+        text (str): The document text.
+
+    Returns:
+        List[str]: The word shingles of the text.
+    """
+    tokens = re.findall(r"\w+", text.lower())
+    if len(tokens) < SHINGLE_SIZE:
+        return [" ".join(tokens)] if tokens else []
+    return [" ".join(tokens[i : i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+
+
+def simhash(text: str) -> int:
+    """
+    Computes a 64-bit SimHash fingerprint. Documents that share most of their shingles
+    (e.g. re-exports or reminders of the same bill) differ in only a few bits.
+
+    Args:
+        text (str): The document text.
+
+    Returns:
+        int: The fingerprint.
+    """
+    weights = [0] * FINGERPRINT_BITS
+    for shingle, count in Counter(_shingles(text)).items():
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += count if value >> bit & 1 else -count
+    return sum(1 << bit for bit in range(FINGERPRINT_BITS) if weights[bit] > 0)
+
+
+class NearDuplicateIndex:
+    """
+    A persistent SimHash index over parsed documents and their extracted records.
+    Lookups use LSH banding: the fingerprint is split into ``max_distance + 1`` bands, so any
+    fingerprint within ``max_distance`` bits shares at least one band exactly and is found
+    with a few dictionary lookups instead of a scan.
+    """
+
+    def __init__(
+        self,
+        index_path: Path = SIMILARITY_INDEX_PATH,
+        max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE,
+    ):
+        """
+        Initializes the NearDuplicateIndex, loading previous entries from disk.
+
+        Args:
+            index_path (Path): The JSON file the index is persisted to.
+            max_distance (int): Maximum Hamming distance for two documents to be duplicates.
+        """
+        self.index_path = Path(index_path)
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = FINGERPRINT_BITS // self.bands
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._buckets: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+        self._load()
+
+    def _band_keys(self, fingerprint: int) -> List[Tuple[int, int]]:
+        """
+        Splits a fingerprint into its LSH band keys.
+
+        Args:
+            fingerprint (int): The SimHash fingerprint.
+
+        Returns:
+            List[Tuple[int, int]]: (band index, band value) pairs.
+        """
+        mask = (1 << self.band_bits) - 1
+        return [(band, fingerprint >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def _load(self) -> None:
+        """Loads the persisted index, starting empty if it is missing or unreadable."""
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                documents = json.load(f)
+        except Exception as e:
+            print(f"Error reading similarity index {self.index_path}: {e}")
+            return
+        for doc_id, entry in documents.items():
+            self._insert(doc_id, int(entry["fingerprint"], 16), entry["records"])
+
+    def _save(self) -> None:
+        """Writes the index to disk atomically."""
+        documents = {
+            doc_id: {"fingerprint": f"{entry['fingerprint']:016x}", "records": entry["records"]}
+            for doc_id, entry in self._documents.items()
+        }
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(documents, f)
+            tmp_path.replace(self.index_path)
+        except Exception as e:
+            print(f"Error saving similarity index {self.index_path}: {e}")
+
+    def _insert(self, doc_id: str, fingerprint: int, records: List[Dict[str, Any]]) -> None:
+        """
+        Adds or replaces an entry in memory.
+
+        Args:
+            doc_id (str): The document identifier.
+            fingerprint (int): The SimHash fingerprint.
+            records (List[Dict[str, Any]]): The records extracted from the document.
+        """
+        previous = self._documents.get(doc_id)
+        if previous is not None:
+            for key in self._band_keys(previous["fingerprint"]):
+                self._buckets[key].discard(doc_id)
+        self._documents[doc_id] = {"fingerprint": fingerprint, "records": records}
+        for key in self._band_keys(fingerprint):
+            self._buckets[key].add(doc_id)
+
+    def add(self, doc_id: str, fingerprint: int, records: List[Dict[str, Any]]) -> None:
+        """
+        Records a successful extraction so near-duplicates of it can reuse the result.
+
+        Args:
+            doc_id (str): The document identifier (e.g. the file name).
+            fingerprint (int): The SimHash fingerprint of the parsed document.
+            records (List[Dict[str, Any]]): The extracted records, keyed by field alias.
+        """
+        self._insert(doc_id, fingerprint, records)
+        self._save()
+
+    def find(self, fingerprint: int) -> Optional[Tuple[str, int]]:
+        """
+        Finds the closest indexed document within ``max_distance`` bits.
+
+        Args:
+            fingerprint (int): The SimHash fingerprint to look up.
+
+        Returns:
+            Optional[Tuple[str, int]]: The matching document id and Hamming distance.
+        """
+        candidates = set()
+        for key in self._band_keys(fingerprint):
+            candidates |= self._buckets.get(key, set())
+
+        best = None
+        for doc_id in candidates:
+            distance = (self._documents[doc_id]["fingerprint"] ^ fingerprint).bit_count()
+            if distance <= self.max_distance and (best is None or distance < best[1]):
+                best = (doc_id, distance)
+        return best
+
+    def find_reusable_records(
+        self, fingerprint: int, document_text: str
+    ) -> Optional[Tuple[str, List[ExtractedRecord]]]:
+        """
+        Returns a near-duplicate's records if they still check out against this document's
+        text (same account, amounts, usage and billing period present), so no LLM call is
+        needed. The period is checked separately because old amounts often reappear on a new
+        bill as previous balances or usage history.
+
+        Args:
+            fingerprint (int): The SimHash fingerprint of the document.
+            document_text (str): The parsed document text.
+
+        Returns:
+            Optional[Tuple[str, List[ExtractedRecord]]]: The matching document id and its
+                records, or None if there is no match or the records fail re-verification.
+        """
+        match = self.find(fingerprint)
+        if match is None:
+            return None
+
+        doc_id, distance = match
+        records = [
+            ExtractedRecord.model_validate(record) for record in self._documents[doc_id]["records"]
+        ]
+        problems = validate_records(records, document_text)
+        problems += validate_dates_in_source(records, document_text)
+        if problems:
+            print(
+                f"   Near-duplicate of {doc_id} (distance {distance}) but its records do not "
+                f"verify ({'; '.join(problems[:3])}). Extracting again."
+            )
+            return None
+        print(f"   Near-duplicate of {doc_id} (distance {distance}), reusing its extraction.")
+        return doc_id, records
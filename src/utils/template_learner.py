@@ -0,0 +1,354 @@
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import TEMPLATES_PATH, TEMPLATE_MAX_DISTANCE
+from src.schemas import ExtractedRecord
+from src.utils.record_validator import (
+    DATE_FORMATS,
+    DATE_TOKEN_PATTERN,
+    MISSING,
+    number_forms,
+    parse_date_token,
+    validate_records,
+)
+from src.utils.similarity_index import simhash
+
+# How each ExtractedRecord field (by alias) is located and rendered.
+FIELD_KINDS = {
+    "Account Number": "id",
+    "Meter Number": "id",
+    "From Date": "date",
+    "To Date": "date",
+    "Usage": "number",
+    "Cost": "number",
+}
+TOKEN_PATTERNS = {
+    "id": re.compile(r"[A-Za-z]*\d[\w-]*(?: [A-Za-z]*\d[\w-]*)*"),
+    "number": re.compile(r"\d[\d,.]*\d|\d"),
+    "date": DATE_TOKEN_PATTERN,
+}
+# How many lines above a bare value to look for its label.
+MAX_ANCHOR_DISTANCE = 3
+# Label words that identify each field's anchor. When a value appears several times, the
+# occurrence whose label has the most of these wins (e.g. the billing period line rather than
+# a demand timestamp that happens to fall on the first day of the period).
+FIELD_LABELS = {
+    "Account Number": ("account",),
+    "Meter Number": ("meter",),
+    "From Date": ("billing", "period", "service", "from"),
+    "To Date": ("billing", "period", "service", "to", "through"),
+    "Usage": ("usage", "used", "kwh", "therms", "total"),
+    "Cost": ("amount", "due", "total", "owe", "charges"),
+}
+
+
+def _normalize(text: str) -> str:
+    """
+    Reduces layout text to a comparable anchor: lowercase, digit runs masked as '#',
+    punctuation dropped and whitespace collapsed.
+
+    Args:
+        text (str): A line or line prefix.
+
+    Returns:
+        str: The normalised anchor text.
+    """
+    text = re.sub(r"\d+", "#", text.lower())
+    text = re.sub(r"[^a-z# ]+", " ", text)
+    return " ".join(text.split())
+
+
+def layout_fingerprint(document_text: str) -> int:
+    """
+    Fingerprints a document's layout: its labelled lines with all values masked, so bills
+    from the same template produce nearby SimHash fingerprints month after month.
+
+    Args:
+        document_text (str): The parsed document text.
+
+    Returns:
+        int: The 64-bit layout fingerprint.
+    """
+    skeleton = [_normalize(line) for line in document_text.splitlines()]
+    return simhash("\n".join(line for line in skeleton if re.search(r"[a-z]", line)))
+
+
+def _parse_number_token(token: str) -> Optional[float]:
+    """
+    Parses a number written in either US (1,234.56) or European (1.234,56) style.
+
+    Args:
+        token (str): The number as written in the document.
+
+    Returns:
+        Optional[float]: The parsed value.
+    """
+    if re.fullmatch(r"\d{1,3}(\.\d{3})+(,\d+)?|\d+,\d{1,2}", token):
+        token = token.replace(".", "").replace(",", ".")
+    else:
+        token = token.replace(",", "")
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+def _compact(value: str) -> str:
+    """
+    Strips separators from an identifier for comparison.
+
+    Args:
+        value (str): The identifier.
+
+    Returns:
+        str: The lowercase alphanumeric characters of the identifier.
+    """
+    return re.sub(r"[^0-9a-z]", "", value.lower())
+
+
+class TemplateLearner:
+    """
+    Learns per-vendor extraction templates from successful LLM extractions. A template maps
+    each field to the anchor text it was found next to, so later bills with the same layout
+    can be extracted locally in milliseconds. Only single-record documents are learned;
+    anything that fails validation falls back to the LLM.
+    """
+
+    def __init__(
+        self, templates_path: Path = TEMPLATES_PATH, max_distance: int = TEMPLATE_MAX_DISTANCE
+    ):
+        """
+        Initializes the TemplateLearner, loading previously learned templates from disk.
+
+        Args:
+            templates_path (Path): The JSON file templates are persisted to.
+            max_distance (int): Maximum Hamming distance between layout fingerprints for a
+                template to be tried on a document.
+        """
+        self.templates_path = Path(templates_path)
+        self.max_distance = max_distance
+        self.templates: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """Loads persisted templates, starting empty if the file is missing or unreadable."""
+        if not self.templates_path.exists():
+            return
+        try:
+            with open(self.templates_path, "r", encoding="utf-8") as f:
+                self.templates = json.load(f)
+        except Exception as e:
+            print(f"Error reading templates {self.templates_path}: {e}")
+
+    def _save(self) -> None:
+        """Writes the templates to disk atomically."""
+        try:
+            self.templates_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.templates_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.templates, f, indent=2)
+            tmp_path.replace(self.templates_path)
+        except Exception as e:
+            print(f"Error saving templates {self.templates_path}: {e}")
+
+    def _locate(self, lines: List[str], spec: Dict[str, Any]) -> Optional[str]:
+        """
+        Finds the token a field spec points to.
+
+        Args:
+            lines (List[str]): The document lines.
+            spec (Dict[str, Any]): The learned field spec.
+
+        Returns:
+            Optional[str]: The raw token text, or None if the anchor is not found.
+        """
+        pattern = TOKEN_PATTERNS[spec["kind"]]
+        for i, line in enumerate(lines):
+            if spec["offset"]:
+                if _normalize(line) != spec["anchor"] or i + spec["offset"] >= len(lines):
+                    continue
+                target = lines[i + spec["offset"]]
+            else:
+                target = line
+            for match in pattern.finditer(target):
+                if _normalize(target[: match.start()]) == spec["prefix"]:
+                    return match.group()
+        return None
+
+    def _render(self, token: str, spec: Dict[str, Any]) -> Optional[str]:
+        """
+        Converts a raw token to the record's value format.
+
+        Args:
+            token (str): The raw token text.
+            spec (Dict[str, Any]): The learned field spec.
+
+        Returns:
+            Optional[str]: The formatted value, or None if the token cannot be parsed.
+        """
+        if spec["kind"] == "id":
+            return token.replace(" ", "") if spec.get("compact") else token
+        if spec["kind"] == "date":
+            parsed = parse_date_token(token, spec["date_format"])
+            return parsed.isoformat() if parsed else None
+        value = _parse_number_token(token)
+        return None if value is None else f"{value:,.{spec['decimals']}f}"
+
+    def _matches(self, kind: str, token: str, value: str) -> Optional[Dict[str, Any]]:
+        """
+        Checks whether a document token is the source of an extracted value.
+
+        Args:
+            kind (str): The field kind ('id', 'date' or 'number').
+            token (str): The raw token text.
+            value (str): The extracted value.
+
+        Returns:
+            Optional[Dict[str, Any]]: Kind-specific rendering options if it matches.
+        """
+        if kind == "id":
+            if _compact(token) == _compact(value):
+                return {"compact": " " in token and " " not in value}
+            return None
+        if kind == "date":
+            for date_format in DATE_FORMATS:
+                if str(parse_date_token(token, date_format)) == value:
+                    return {"date_format": date_format}
+            return None
+        if number_forms(token) & number_forms(value):
+            decimals = len(value.split(".")[1]) if "." in value else 0
+            return {"decimals": decimals}
+        return None
+
+    @staticmethod
+    def _anchor_score(alias: str, spec: Dict[str, Any], line: str) -> int:
+        """
+        Ranks a candidate anchor by how well its label describes the field.
+
+        Args:
+            alias (str): The field alias.
+            spec (Dict[str, Any]): The candidate field spec.
+            line (str): The line holding the value.
+
+        Returns:
+            int: The number of the field's label words in the anchor, plus one for a date on
+                a line holding a date range (a from/to period line).
+        """
+        words = set(f"{spec['prefix']} {spec['anchor'] or ''}".split())
+        score = sum(word in words for word in FIELD_LABELS[alias])
+        if spec["kind"] == "date" and len(TOKEN_PATTERNS["date"].findall(line)) >= 2:
+            score += 1
+        return score
+
+    def _learn_field(self, lines: List[str], alias: str, value: str) -> Optional[Dict[str, Any]]:
+        """
+        Finds the best-labelled anchor for a field value that resolves back to the same value.
+
+        Args:
+            lines (List[str]): The document lines.
+            alias (str): The field alias.
+            value (str): The extracted value.
+
+        Returns:
+            Optional[Dict[str, Any]]: The field spec, or None if no reliable anchor exists.
+        """
+        kind = FIELD_KINDS[alias]
+        best_spec, best_score = None, -1
+        for i, line in enumerate(lines):
+            for match in TOKEN_PATTERNS[kind].finditer(line):
+                options = self._matches(kind, match.group(), value)
+                if options is None:
+                    continue
+                prefix = _normalize(line[: match.start()])
+                spec = {"kind": kind, "prefix": prefix, "offset": 0, "anchor": None, **options}
+                if not re.search(r"[a-z]", prefix):
+                    # A bare value: anchor it on the nearest labelled line above.
+                    for distance in range(1, MAX_ANCHOR_DISTANCE + 1):
+                        anchor = _normalize(lines[i - distance]) if i >= distance else ""
+                        if re.search(r"[a-z]", anchor):
+                            spec.update(offset=distance, anchor=anchor)
+                            break
+                    else:
+                        continue
+                # Only keep anchors that resolve back to this value, not an earlier look-alike.
+                token = self._locate(lines, spec)
+                rendered = self._render(token, spec) if token is not None else None
+                if rendered == value:
+                    score = self._anchor_score(alias, spec, line)
+                    if score > best_score:
+                        best_spec, best_score = spec, score
+        return best_spec
+
+    def learn(self, doc_id: str, document_text: str, records: List[ExtractedRecord]) -> bool:
+        """
+        Learns a template from a successful extraction.
+
+        Args:
+            doc_id (str): The document identifier (e.g. the file name).
+            document_text (str): The parsed document text.
+            records (List[ExtractedRecord]): The final records extracted by the LLM.
+
+        Returns:
+            bool: True if a template was learned.
+        """
+        if len(records) != 1 or validate_records(records, document_text):
+            return False
+
+        lines = document_text.splitlines()
+        values = records[0].model_dump(by_alias=True)
+        fields = {}
+        for alias in FIELD_KINDS:
+            value = values.get(alias)
+            if value is None or value.strip() in ("", MISSING):
+                fields[alias] = None
+                continue
+            spec = self._learn_field(lines, alias, value.strip())
+            if spec is None:
+                return False
+            fields[alias] = spec
+
+        self.templates[doc_id] = {
+            "fingerprint": f"{layout_fingerprint(document_text):016x}",
+            "fields": fields,
+        }
+        self._save()
+        print(f"   Learned extraction template from {doc_id}")
+        return True
+
+    def apply(self, document_text: str) -> Optional[Tuple[str, List[ExtractedRecord]]]:
+        """
+        Extracts a document locally with the closest matching template.
+
+        Args:
+            document_text (str): The parsed document text.
+
+        Returns:
+            Optional[Tuple[str, List[ExtractedRecord]]]: The template's source document and
+                the extracted records, or None if no template matches and validates.
+        """
+        fingerprint = layout_fingerprint(document_text)
+        candidates = sorted(
+            (
+                ((int(template["fingerprint"], 16) ^ fingerprint).bit_count(), doc_id)
+                for doc_id, template in self.templates.items()
+            )
+        )
+        lines = document_text.splitlines()
+        for distance, doc_id in candidates:
+            if distance > self.max_distance:
+                break
+            values = {}
+            for alias, spec in self.templates[doc_id]["fields"].items():
+                token = self._locate(lines, spec) if spec else None
+                values[alias] = self._render(token, spec) if token else None
+                if spec and values[alias] is None:
+                    break
+                values[alias] = values[alias] or MISSING
+            else:
+                records = [ExtractedRecord.model_validate(values)]
+                if not validate_records(records, document_text):
+                    print(f"   Extracted locally with template learned from {doc_id}")
+                    return doc_id, records
+        return None
@@ -0,0 +1,325 @@
+import re
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import (
+    LLM_MODEL_NAME,
+    RUN_TOKEN_BUDGET,
+    DOCUMENT_TOKEN_BUDGET,
+    RUN_DEADLINE_SECONDS,
+    DOCUMENT_DEADLINE_SECONDS,
+    CALL_OVERHEAD_TOKENS,
+)
+
+FULL = "full"
+PRUNED = "pruned"
+DEFER = "defer"
+
+CHARS_PER_TOKEN = 4
+RELEVANCE_KEYWORDS = (
+    "account",
+    "meter",
+    "amount",
+    "total",
+    "usage",
+    "kwh",
+    "therm",
+    "charge",
+    "period",
+    "invoice",
+    "statement",
+    "due",
+)
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model_name: str):
+    """
+    Loads the tiktoken encoding for a model.
+
+    Args:
+        model_name (str): The LLM model name.
+
+    Returns:
+        The tiktoken encoding, or None if tiktoken or its BPE files are unavailable.
+    """
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            # Non-OpenAI models (e.g. Gemini): o200k_base is a close enough approximation.
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"tiktoken encoding unavailable ({e}), estimating tokens from characters")
+        return None
+
+
+def estimate_tokens(text: str, model_name: str = LLM_MODEL_NAME) -> int:
+    """
+    Estimates the number of tokens in a text.
+
+    Args:
+        text (str): The text to measure.
+        model_name (str): The model whose tokenizer to use.
+
+    Returns:
+        int: The estimated token count.
+    """
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _relevance(text: str) -> float:
+    """
+    Scores how likely a piece of a bill is to contain the fields we extract.
+
+    Args:
+        text (str): A chunk or paragraph of the document.
+
+    Returns:
+        float: Higher for text with billing keywords and numbers.
+    """
+    lowered = text.lower()
+    keyword_hits = sum(lowered.count(keyword) for keyword in RELEVANCE_KEYWORDS)
+    number_hits = len(re.findall(r"\d[\d,.]*\d", text))
+    return (2 * keyword_hits + number_hits) / (1 + len(text) / 1000)
+
+
+class TokenBudgetScheduler:
+    """
+    Bounds what a run spends on the LLM. Estimates tokens before dispatch, enforces per-run
+    and per-document token and deadline budgets, and decides whether a document runs in
+    full, runs on a pruned subset of its text, or is deferred to the next run.
+    """
+
+    def __init__(
+        self,
+        run_token_budget: int = RUN_TOKEN_BUDGET,
+        document_token_budget: int = DOCUMENT_TOKEN_BUDGET,
+        run_deadline_seconds: float = RUN_DEADLINE_SECONDS,
+        document_deadline_seconds: float = DOCUMENT_DEADLINE_SECONDS,
+        call_overhead_tokens: int = CALL_OVERHEAD_TOKENS,
+        model_name: str = LLM_MODEL_NAME,
+    ):
+        """
+        Initializes the TokenBudgetScheduler.
+
+        Args:
+            run_token_budget (int): Maximum tokens (input + output) for the whole run.
+            document_token_budget (int): Maximum tokens for a single document.
+            run_deadline_seconds (float): Wall-clock budget for the whole run.
+            document_deadline_seconds (float): Wall-clock budget for a single document.
+            call_overhead_tokens (int): Tokens per LLM call beyond the document text
+                (instructions, schema and output).
+            model_name (str): The model whose tokenizer is used for estimates.
+        """
+        self.run_token_budget = run_token_budget
+        self.document_token_budget = document_token_budget
+        self.run_deadline_seconds = run_deadline_seconds
+        self.document_deadline_seconds = document_deadline_seconds
+        self.call_overhead_tokens = call_overhead_tokens
+        self.model_name = model_name
+
+        self.started_at = time.monotonic()
+        self.tokens_spent = 0
+        self.deferred: List[Path] = []
+        self.decisions: Counter = Counter()
+
+    @property
+    def remaining_tokens(self) -> int:
+        """Tokens left in the run budget."""
+        return max(0, self.run_token_budget - self.tokens_spent)
+
+    def run_deadline_exceeded(self) -> bool:
+        """
+        Checks the run's wall-clock budget.
+
+        Returns:
+            bool: True once the run deadline has passed.
+        """
+        return time.monotonic() - self.started_at >= self.run_deadline_seconds
+
+    def document_deadline_exceeded(self, document_started_at: float) -> bool:
+        """
+        Checks a document's wall-clock budget.
+
+        Args:
+            document_started_at (float): ``time.monotonic()`` when the document started.
+
+        Returns:
+            bool: True once the document deadline has passed.
+        """
+        return time.monotonic() - document_started_at >= self.document_deadline_seconds
+
+    def prioritise(self, file_paths: List[Path], by: str = "size") -> List[Path]:
+        """
+        Orders documents for dispatch.
+
+        Args:
+            file_paths (List[Path]): The documents to process.
+            by (str): 'size' to run the smallest documents first (most documents within
+                budget) or 'age' to run the oldest documents first.
+
+        Returns:
+            List[Path]: The documents in dispatch order.
+        """
+        if by == "age":
+            return sorted(file_paths, key=lambda path: path.stat().st_mtime)
+        return sorted(file_paths, key=lambda path: path.stat().st_size)
+
+    def estimate_calls(self, texts: List[str]) -> int:
+        """
+        Estimates the tokens needed to extract from each text and consolidate the results.
+
+        Args:
+            texts (List[str]): The text sent in each extraction call.
+
+        Returns:
+            int: The estimated total tokens.
+        """
+        extraction = sum(
+            estimate_tokens(text, self.model_name) + self.call_overhead_tokens for text in texts
+        )
+        return extraction + self.call_overhead_tokens
+
+    def plan(self, texts: List[str]) -> Tuple[str, int]:
+        """
+        Decides how to process a document given the remaining budgets.
+
+        Args:
+            texts (List[str]): The text sent in each extraction call (one item for the
+                standard path, one per chunk for the chunked path).
+
+        Returns:
+            Tuple[str, int]: FULL, PRUNED or DEFER, and the token allowance for the document.
+        """
+        if self.run_deadline_exceeded():
+            self.decisions[DEFER] += 1
+            return DEFER, 0
+
+        allowance = min(self.document_token_budget, self.remaining_tokens)
+        if self.estimate_calls(texts) <= allowance:
+            decision = FULL
+        elif allowance >= 3 * self.call_overhead_tokens:
+            decision = PRUNED
+        else:
+            decision = DEFER
+        self.decisions[decision] += 1
+        return decision, allowance
+
+    def prune(self, pieces: List[str], token_budget: int, per_piece_overhead: int = 0) -> List[str]:
+        """
+        Keeps the most relevant pieces of a document that fit in a token budget.
+
+        Args:
+            pieces (List[str]): Chunks or paragraphs of the document.
+            token_budget (int): Tokens available for the kept pieces.
+            per_piece_overhead (int): Extra tokens charged for each kept piece, e.g. the
+                call overhead when every chunk is a separate LLM call.
+
+        Returns:
+            List[str]: The kept pieces in their original order.
+        """
+        ranked = sorted(range(len(pieces)), key=lambda i: _relevance(pieces[i]), reverse=True)
+        kept, used = set(), 0
+        for i in ranked:
+            cost = estimate_tokens(pieces[i], self.model_name) + per_piece_overhead
+            if used + cost <= token_budget:
+                kept.add(i)
+                used += cost
+        return [pieces[i] for i in sorted(kept)]
+
+    def charge(self, tokens: int) -> None:
+        """
+        Records tokens spent against the run budget.
+
+        Args:
+            tokens (int): Tokens consumed by a document.
+        """
+        self.tokens_spent += tokens
+
+    def checkpoint(self, llm_service: Any) -> Optional[int]:
+        """
+        Reads the total tokens an LLMService has consumed so far.
+
+        Args:
+            llm_service: The LLMService.
+
+        Returns:
+            Optional[int]: Input plus output tokens, or None if usage is not tracked.
+        """
+        usage = getattr(llm_service, "usage", None)
+        if not isinstance(usage, dict):
+            return None
+        return usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+
+    def settle(self, llm_service: Any, checkpoint: Optional[int], texts: List[str]) -> None:
+        """
+        Charges a finished document's actual token usage, falling back to the estimate
+        when the provider did not report usage.
+
+        Args:
+            llm_service: The LLMService that processed the document.
+            checkpoint (Optional[int]): The ``checkpoint`` taken before the document started.
+            texts (List[str]): The text sent in each extraction call.
+        """
+        current = self.checkpoint(llm_service)
+        if checkpoint is not None and current is not None and current > checkpoint:
+            self.charge(current - checkpoint)
+        else:
+            self.charge(self.estimate_calls(texts))
+
+    def within_document_budget(
+        self, llm_service: Any, checkpoint: Optional[int], allowance: int, texts: List[str]
+    ) -> bool:
+        """
+        Checks, mid-document, whether the calls still to come fit the document's allowance.
+        Used before escalating to a stronger model (``texts`` is the document) and before
+        consolidating (``texts`` is empty).
+
+        Args:
+            llm_service: The LLMService processing the document.
+            checkpoint (Optional[int]): The ``checkpoint`` taken before the document started.
+            allowance (int): The token allowance returned by ``plan``.
+            texts (List[str]): The text of the extraction calls still to come.
+
+        Returns:
+            bool: False once the tokens spent so far plus the estimate would exceed the
+                allowance. True when usage is not tracked.
+        """
+        current = self.checkpoint(llm_service)
+        if checkpoint is None or current is None:
+            return True
+        return current - checkpoint + self.estimate_calls(texts) <= allowance
+
+    def defer(self, file_path: Path) -> None:
+        """
+        Records a document left for the next run.
+
+        Args:
+            file_path (Path): The deferred document.
+        """
+        self.deferred.append(file_path)
+
+    def get_report(self) -> Dict[str, Any]:
+        """
+        Summarises the run's budget usage.
+
+        Returns:
+            Dict[str, Any]: Tokens spent and remaining, elapsed seconds, decision counts
+                and the names of deferred documents.
+        """
+        return {
+            "tokens_spent": self.tokens_spent,
+            "tokens_remaining": self.remaining_tokens,
+            "elapsed_seconds": time.monotonic() - self.started_at,
+            "decisions": dict(self.decisions),
+            "deferred": [path.name for path in self.deferred],
+        }
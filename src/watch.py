@@ -0,0 +1,70 @@
+import argparse
+import signal
+import sys
+import time
+
+from src.config import DOCUMENTS_DIR, OUTPUT_CSV_PATH, COLUMNS_TO_EXTRACT
+from src.utils.data_extractor import DataExtractor
+from src.utils.file_handler import append_to_csv
+from src.utils.file_watcher import DirectoryWatcher
+from src.utils.similarity_index import NearDuplicateIndex
+from src.utils.template_learner import TemplateLearner
+
+
+def main():
+    """
+    Long-running daemon that watches the documents directory and extracts new PDFs as they
+    land, keeping the parser, LLM clients and caches warm between documents.
+    """
+    arg_parser = argparse.ArgumentParser(description="Watch for new bills and extract them.")
+    arg_parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=2.0,
+        help="Seconds between directory scans when inotify is unavailable.",
+    )
+    arg_parser.add_argument(
+        "--process-existing",
+        action="store_true",
+        help="Also extract the PDFs already present in the directory on start-up.",
+    )
+    args = arg_parser.parse_args()
+
+    # Let `docker stop` / systemd shut the daemon down through the normal exit path.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    print("--- Starting ESG Flo Data Extraction Daemon ---")
+    extractor = DataExtractor(
+        similarity_index=NearDuplicateIndex(), template_learner=TemplateLearner()
+    )
+    watcher = DirectoryWatcher(DOCUMENTS_DIR, poll_interval=args.poll_interval)
+
+    if args.process_existing:
+        pending = sorted(DOCUMENTS_DIR.glob("*.pdf"))
+    else:
+        pending = []
+    watcher.mark_existing_as_seen()
+
+    print(f"Waiting for new PDFs in {DOCUMENTS_DIR} (Ctrl+C to stop)...")
+    try:
+        while True:
+            for file_path in pending:
+                start_time = time.time()
+                try:
+                    records = extractor.extract_from_file(file_path)
+                    append_to_csv(records, OUTPUT_CSV_PATH, COLUMNS_TO_EXTRACT)
+                except Exception as e:
+                    print(f"!! An unexpected error occurred while processing {file_path.name}: {e}")
+                print(
+                    f"--- {file_path.name} processed in {time.time() - start_time:.2f} seconds ---"
+                )
+            pending = watcher.wait_for_new_files()
+    except (KeyboardInterrupt, SystemExit):
+        print("\nStopping daemon.")
+    finally:
+        watcher.close()
+        extractor.llm_service.close()
+
+
+if __name__ == "__main__":
+    main()
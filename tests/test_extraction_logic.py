@@ -2,8 +2,9 @@ import pytest
 from unittest.mock import MagicMock
 from pathlib import Path
 
-from src.utils.data_extractor import DataExtractor
+from src.utils.data_extractor import AdvancedDataExtractor, DataExtractor
 from src.schemas import DocumentExtractionResult, ExtractedRecord
+from src.utils.token_budget import TokenBudgetScheduler
 
 # Mock data to be returned by the LLM service
 MOCK_EXTRACTED_DATA = DocumentExtractionResult(
@@ -33,6 +34,7 @@ def mocked_data_extractor(mocker):
     # Mock LLMService
     mock_llm_service = MagicMock()
     mock_llm_service.extract_structured_data.return_value = MOCK_EXTRACTED_DATA
+    mock_llm_service.consolidate_records.return_value = MOCK_EXTRACTED_DATA
     mocker.patch("src.utils.data_extractor.LLMService", return_value=mock_llm_service)
 
     return DataExtractor()
@@ -55,7 +57,7 @@ def test_extract_from_file_success(mocked_data_extractor):
     # Check if the dependencies were called correctly
     mocked_data_extractor.parser.parse_document.assert_called_once_with(dummy_file_path)
     mocked_data_extractor.llm_service.extract_structured_data.assert_called_once_with(
-        "This is a mock PDF text content."
+        "This is a mock PDF text content.", can_escalate=None
     )
 
 
@@ -71,3 +73,122 @@ def test_extract_from_file_parsing_failure(mocker):
 
     assert result == []
     extractor.llm_service.extract_structured_data.assert_not_called()
+
+
+def test_extract_from_file_deferred_when_over_budget(mocker):
+    """
+    Tests that a document over the run budget is deferred without calling the LLM.
+    """
+    mocker.patch(
+        "src.utils.data_extractor.PDFParser.parse_document", return_value="Mock bill text."
+    )
+    mocker.patch("src.utils.data_extractor.LLMService")
+    scheduler = TokenBudgetScheduler(run_token_budget=0)
+
+    extractor = DataExtractor(scheduler=scheduler)
+    result = extractor.extract_from_file(Path("dummy/deferred_doc.pdf"))
+
+    assert result == []
+    assert scheduler.get_report()["deferred"] == ["deferred_doc.pdf"]
+    extractor.llm_service.extract_structured_data.assert_not_called()
+
+
+def test_extract_from_file_deferred_when_nothing_fits_after_pruning(mocker):
+    """
+    Tests that a document whose only paragraph does not fit the allowance is deferred
+    instead of sending an empty prompt.
+    """
+    mocker.patch(
+        "src.utils.data_extractor.PDFParser.parse_document",
+        return_value="Account Number 12345 Cost 1,234.56 " * 50,
+    )
+    mocker.patch("src.utils.data_extractor.LLMService")
+    scheduler = TokenBudgetScheduler(document_token_budget=40, call_overhead_tokens=10)
+
+    extractor = DataExtractor(scheduler=scheduler)
+    result = extractor.extract_from_file(Path("dummy/one_block_doc.pdf"))
+
+    assert result == []
+    assert scheduler.get_report()["deferred"] == ["one_block_doc.pdf"]
+    extractor.llm_service.extract_structured_data.assert_not_called()
+
+
+def test_extract_from_file_does_not_escalate_past_document_deadline(mocker):
+    """
+    Tests that the escalation check vetoes escalating a document whose deadline has passed.
+    """
+    mocker.patch(
+        "src.utils.data_extractor.PDFParser.parse_document", return_value="Mock bill text."
+    )
+    mock_llm_service = MagicMock()
+    escalation_checks = []
+
+    def extract(text, can_escalate=None):
+        escalation_checks.append(can_escalate())
+        return MOCK_EXTRACTED_DATA
+
+    mock_llm_service.extract_structured_data.side_effect = extract
+    mock_llm_service.consolidate_records.return_value = MOCK_EXTRACTED_DATA
+    mocker.patch("src.utils.data_extractor.LLMService", return_value=mock_llm_service)
+    scheduler = TokenBudgetScheduler(document_deadline_seconds=0)
+
+    extractor = DataExtractor(scheduler=scheduler)
+    result = extractor.extract_from_file(Path("dummy/slow_doc.pdf"))
+
+    assert len(result) == 1
+    assert escalation_checks == [False]
+
+
+def test_extract_from_file_keeps_extraction_when_consolidation_fails_validation(mocker):
+    """
+    Tests that consolidated records are discarded when they fail validation that the
+    extracted records passed.
+    """
+    mocker.patch(
+        "src.utils.data_extractor.PDFParser.parse_document",
+        return_value=(
+            "Account Number: ACC-12345 Meter: MTR-67890\n"
+            "Usage 154,150.50 kWh, amount due $54,575.25"
+        ),
+    )
+    mock_llm_service = MagicMock()
+    mock_llm_service.extract_structured_data.return_value = MOCK_EXTRACTED_DATA
+    mock_llm_service.consolidate_records.return_value = DocumentExtractionResult(
+        records=[MOCK_EXTRACTED_DATA.records[0].model_copy(update={"cost": "99,999.99"})]
+    )
+    mocker.patch("src.utils.data_extractor.LLMService", return_value=mock_llm_service)
+
+    result = DataExtractor().extract_from_file(Path("dummy/escalated_doc.pdf"))
+
+    assert result[0]["Cost"] == "54,575.25"
+
+
+def test_advanced_extractor_charges_consolidation_tokens(mocker):
+    """
+    Tests that the chunked path settles the budget after consolidation, so the
+    consolidation call's tokens are charged to the document.
+    """
+    mocker.patch(
+        "src.utils.data_extractor.PDFParser.parse_document", return_value="Mock bill text."
+    )
+    mock_llm_service = MagicMock()
+    mock_llm_service.usage = {"input_tokens": 0, "output_tokens": 0}
+
+    def extract(chunk, cascade=True):
+        mock_llm_service.usage["input_tokens"] += 100
+        return MOCK_EXTRACTED_DATA
+
+    def consolidate(records):
+        mock_llm_service.usage["input_tokens"] += 40
+        return MOCK_EXTRACTED_DATA
+
+    mock_llm_service.extract_structured_data.side_effect = extract
+    mock_llm_service.consolidate_records.side_effect = consolidate
+    mocker.patch("src.utils.data_extractor.LLMService", return_value=mock_llm_service)
+    scheduler = TokenBudgetScheduler(run_token_budget=100_000, document_token_budget=10_000)
+
+    extractor = AdvancedDataExtractor(scheduler=scheduler)
+    result = extractor.extract_from_file(Path("dummy/long_doc.pdf"))
+
+    assert len(result) == 1
+    assert scheduler.get_report()["tokens_spent"] == 140
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from src.utils.file_handler import append_to_csv
+from src.utils.file_watcher import DirectoryWatcher
+
+
+def test_polling_watcher_reports_only_new_settled_files(tmp_path):
+    """
+    Tests that pre-existing PDFs are ignored and new ones are reported exactly once.
+    """
+    (tmp_path / "old.pdf").write_bytes(b"%PDF-old")
+    watcher = DirectoryWatcher(tmp_path, poll_interval=0.01, use_inotify=False)
+    watcher.mark_existing_as_seen()
+
+    (tmp_path / "new.pdf").write_bytes(b"%PDF-new")
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    assert watcher.wait_for_new_files(timeout=1.0) == [tmp_path / "new.pdf"]
+    assert watcher.wait_for_new_files(timeout=0.05) == []
+
+
+def test_inotify_watcher_reports_new_files(tmp_path):
+    """
+    Tests that new PDFs are reported whichever backend is available on this platform.
+    """
+    watcher = DirectoryWatcher(tmp_path, poll_interval=0.01)
+    try:
+        (tmp_path / "bill.pdf").write_bytes(b"%PDF-bill")
+        assert watcher.wait_for_new_files(timeout=2.0) == [tmp_path / "bill.pdf"]
+    finally:
+        watcher.close()
+
+
+def test_append_to_csv_writes_header_once(tmp_path):
+    """
+    Tests that repeated appends produce a single header and all rows.
+    """
+    output_path = tmp_path / "out.csv"
+    columns = ["Account Number", "Cost"]
+
+    append_to_csv([{"Filename": "a", "Account Number": "1", "Cost": "2.00"}], output_path, columns)
+    append_to_csv([{"Filename": "b", "Account Number": "3"}], output_path, columns)
+
+    df = pd.read_csv(output_path, dtype=str)
+    assert list(df.columns) == ["Filename", "Account Number", "Cost"]
+    assert df["Filename"].tolist() == ["a", "b"]
+    assert df["Cost"].tolist() == ["2.00", "-"]
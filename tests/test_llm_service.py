@@ -0,0 +1,393 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from src.schemas import DocumentExtractionResult
+from src.utils.llm_service import LLMService
+
+
+CASCADE = {"escalation_models": ["strong-model"]}
+ROUTED = {"openai_api_key": "test-key", "secondary_models": ["gpt-4o-mini"]}
+
+
+@pytest.fixture
+def llm_service(request, mocker):
+    """
+    Fixture to create an LLMService without touching the Gemini cache API. Constructor
+    arguments are overridden with ``pytest.mark.parametrize(..., indirect=True)``.
+    """
+    mocker.patch.object(LLMService, "_create_gemini_context_cache", return_value=None)
+    overrides = getattr(request, "param", {})
+    return LLMService(**{"gemini_api_key": "test-key", "openai_api_key": "", **overrides})
+
+
+def test_cache_friendly_prompt_has_stable_prefix(llm_service):
+    """
+    Tests that the static instructions come first and are identical across documents.
+    """
+    first = llm_service.extraction_prompt.format_messages(document_text="Bill A")
+    second = llm_service.extraction_prompt.format_messages(document_text="Bill B")
+
+    assert first[0].content == second[0].content
+    assert "format_instructions" not in first[0].content
+    assert "Bill A" not in first[0].content
+    assert "Bill A" in first[-1].content
+
+
+def test_prompt_layouts_share_instructions():
+    """
+    Tests that the legacy and cache-friendly extraction prompts use the same instructions.
+    """
+    assert LLMService.EXTRACTION_INSTRUCTIONS in LLMService.EXTRACTION_PROMPT_TEMPLATE
+    assert LLMService.EXTRACTION_INSTRUCTIONS in LLMService.EXTRACTION_SYSTEM_PROMPT
+
+
+@pytest.mark.parametrize(
+    "llm_service", [{"gemini_cached_content": "cachedContents/abc"}], indirect=True
+)
+def test_explicit_gemini_cache_sends_only_document(llm_service):
+    """
+    Tests that with a cached-content handle the static prefix is not re-sent.
+    """
+    messages = llm_service.extraction_prompt.format_messages(document_text="Bill A")
+
+    assert llm_service.gemini_cached_content == "cachedContents/abc"
+    assert len(messages) == 1
+    assert "Bill A" in messages[0].content
+
+
+def test_usage_report_splits_cached_tokens(llm_service):
+    """
+    Tests that cached and uncached input tokens are reported separately.
+    """
+    llm_service._record_usage(
+        AIMessage(
+            content="",
+            usage_metadata={
+                "input_tokens": 1000,
+                "output_tokens": 50,
+                "total_tokens": 1050,
+                "input_token_details": {"cache_read": 800},
+            },
+        )
+    )
+    report = llm_service.get_usage_report()
+
+    assert report["calls"] == 1
+    assert report["cached_input_tokens"] == 800
+    assert report["uncached_input_tokens"] == 200
+    assert report["cache_hit_ratio"] == pytest.approx(0.8)
+
+
+def test_usage_counters_are_exact_across_threads(llm_service):
+    """
+    Tests that usage recorded concurrently by the extraction service's workers is not lost.
+    """
+    message = AIMessage(
+        content="", usage_metadata={"input_tokens": 10, "output_tokens": 1, "total_tokens": 11}
+    )
+
+    def record():
+        for _ in range(500):
+            llm_service._record_usage(message)
+
+    workers = [threading.Thread(target=record) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    report = llm_service.get_usage_report()
+
+    assert report["calls"] == 4000
+    assert report["input_tokens"] == 40000
+
+
+VALID_RECORD = {
+    "Account Number": "7851218574918",
+    "Meter Number": "-",
+    "From Date": "2023-01-20",
+    "To Date": "2023-02-19",
+    "Usage": "-",
+    "Cost": "27,256.52",
+}
+SOURCE_TEXT = "Account Number: 7851218574918\nYour new charges $27,256.52"
+
+
+def _result(**overrides):
+    return DocumentExtractionResult(records=[{**VALID_RECORD, **overrides}])
+
+
+@pytest.mark.parametrize("llm_service", [CASCADE], indirect=True)
+def test_cascade_stops_at_primary_model_when_valid(llm_service, mocker):
+    """
+    Tests that a valid primary-model result is not escalated.
+    """
+    run = mocker.patch.object(
+        llm_service, "_run_extraction", return_value=("gemini-2.5-flash", _result())
+    )
+
+    result = llm_service.extract_structured_data(SOURCE_TEXT)
+
+    assert result.records[0].cost == "27,256.52"
+    run.assert_called_once_with(0, SOURCE_TEXT)
+    assert llm_service.get_cascade_report()["escalated"] == 0
+
+
+@pytest.mark.parametrize("llm_service", [CASCADE], indirect=True)
+def test_cascade_escalates_on_validation_failure(llm_service, mocker):
+    """
+    Tests that an invalid primary-model result is retried with the stronger model.
+    """
+    mocker.patch.object(
+        llm_service,
+        "_run_extraction",
+        side_effect=[
+            ("gemini-2.5-flash", _result(Cost="99,999.99")),
+            ("strong-model", _result()),
+        ],
+    )
+
+    result = llm_service.extract_structured_data(SOURCE_TEXT)
+    report = llm_service.get_cascade_report()
+
+    assert result.records[0].cost == "27,256.52"
+    assert report["escalated"] == 1
+    assert report["escalation_rate"] == 1.0
+    assert report["latency_saved_seconds"] is not None
+
+
+@pytest.mark.parametrize("llm_service", [CASCADE], indirect=True)
+def test_cascade_does_not_escalate_past_document_budget(llm_service, mocker):
+    """
+    Tests that an invalid result is kept when the caller's budget check vetoes escalation.
+    """
+    run = mocker.patch.object(
+        llm_service, "_run_extraction", return_value=("gemini-2.5-flash", _result(Cost="1.00"))
+    )
+
+    result = llm_service.extract_structured_data(SOURCE_TEXT, can_escalate=lambda: False)
+
+    assert result.records[0].cost == "1.00"
+    run.assert_called_once_with(0, SOURCE_TEXT)
+
+
+@pytest.mark.parametrize("llm_service", [ROUTED], indirect=True)
+def test_routes_across_providers_when_both_keys_are_set(llm_service, mocker):
+    """
+    Tests that with both providers configured extraction goes through the router, which
+    receives a request for each provider, and the winning response is parsed.
+    """
+    invoke = mocker.patch.object(
+        llm_service.router,
+        "invoke",
+        return_value=("openai", AIMessage(content=_result().model_dump_json(by_alias=True))),
+    )
+
+    result = llm_service.extract_structured_data(SOURCE_TEXT, cascade=False)
+
+    assert set(invoke.call_args.args[0]) == {"gemini", "openai"}
+    assert result.records[0].cost == "27,256.52"
+    assert llm_service.get_usage_report()["calls"] == 1
+
+
+@pytest.mark.parametrize(
+    "llm_service",
+    [
+        {
+            "openai_api_key": "test-key",
+            "model_name": "gemini-2.5-flash",
+            "escalation_models": ["gemini-2.5-pro"],
+            "secondary_models": ["gpt-4o-mini", "gpt-4o"],
+        }
+    ],
+    indirect=True,
+)
+def test_routed_cascade_credits_the_answering_model(llm_service, mocker):
+    """
+    Tests that cascade latency is recorded under the model that actually answered, and that
+    hedged calls (whose cancelled requests report no usage) are counted in the usage report.
+    """
+    mocker.patch.object(
+        llm_service.router,
+        "invoke",
+        return_value=("openai", AIMessage(content=_result().model_dump_json(by_alias=True))),
+    )
+    llm_service.router.stats["gemini"]["hedged"] = 2
+
+    llm_service.extract_structured_data(SOURCE_TEXT)
+
+    assert set(llm_service.get_cascade_report()["mean_latency_by_model"]) == {"gpt-4o-mini"}
+    assert llm_service.get_usage_report()["hedged_calls"] == 2
+
+
+def _fake_llm(content):
+    """Builds a chat model that streams ``content`` word by word."""
+    return GenericFakeChatModel(messages=iter([AIMessage(content=content)]))
+
+
+def test_streaming_yields_records_before_response_ends(llm_service):
+    """
+    Tests that the first record is available before the rest of the response is generated.
+    """
+    records_json = json.dumps({"records": [VALID_RECORD, {**VALID_RECORD, "Cost": "1.00"}]})
+    llm_service.llm = _fake_llm(records_json)
+
+    stream = llm_service.stream_structured_data(SOURCE_TEXT)
+    first = next(stream)
+
+    assert first.cost == "27,256.52"
+    assert llm_service.usage["calls"] == 0
+    assert [record.cost for record in stream] == ["1.00"]
+    assert llm_service.usage["calls"] == 1
+
+
+@pytest.mark.parametrize("llm_service", [ROUTED], indirect=True)
+def test_streamed_call_is_recorded_by_the_router(llm_service):
+    """
+    Tests that a streamed call counts as a measurement, so routing moves on to the
+    provider that has not been measured yet.
+    """
+    llm_service.llm = _fake_llm(json.dumps({"records": [VALID_RECORD]}))
+
+    assert len(list(llm_service.stream_structured_data(SOURCE_TEXT))) == 1
+    # Router stats are updated on its event loop thread.
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), llm_service.router._ensure_loop()).result()
+
+    report = llm_service.get_routing_report()
+    assert report["gemini"]["requests"] == 1
+    assert report["gemini"]["calls"]["extraction:0"]["p50_latency"] is not None
+    assert llm_service.router.order(["gemini", "openai"], "extraction:0")[0] == "openai"
+
+
+def test_truncated_response_keeps_complete_records(llm_service):
+    """
+    Tests that a response cut off mid-record keeps the complete records, both when
+    streaming and when parsing a whole response.
+    """
+    records_json = json.dumps({"records": [VALID_RECORD, VALID_RECORD]})
+    truncated = records_json[: records_json.rindex("Cost")]
+
+    llm_service.llm = _fake_llm(truncated)
+    streamed = llm_service.extract_structured_data(SOURCE_TEXT, cascade=False)
+
+    llm_service.streaming = False
+    llm_service.llm = _fake_llm(truncated)
+    parsed = llm_service.extract_structured_data(SOURCE_TEXT, cascade=False)
+
+    assert len(streamed.records) == 1
+    assert len(parsed.records) == 1
+
+
+def test_owned_gemini_cache_is_extended_recreated_and_deleted(mocker):
+    """
+    Tests that a service-created cache has its TTL extended once most of it has passed, is
+    recreated if it is gone, and is deleted on close.
+    """
+    create = mocker.patch.object(
+        LLMService,
+        "_create_gemini_context_cache",
+        side_effect=["cachedContents/first", "cachedContents/second"],
+    )
+    extend = mocker.patch.object(LLMService, "_extend_gemini_context_cache", return_value=True)
+    client = mocker.patch("google.ai.generativelanguage_v1beta.CacheServiceClient")
+    service = LLMService(gemini_api_key="test-key", openai_api_key="")
+
+    service._refresh_gemini_cache()
+    extend.assert_not_called()
+
+    service._gemini_cache_refresh_at = 0.0
+    service._refresh_gemini_cache()
+    extend.assert_called_once_with("cachedContents/first")
+
+    extend.return_value = False
+    service._gemini_cache_refresh_at = 0.0
+    service._refresh_gemini_cache()
+    assert create.call_count == 2
+    assert service.gemini_cached_content == "cachedContents/second"
+
+    service.close()
+    client.return_value.delete_cached_content.assert_called_once_with(name="cachedContents/second")
+    assert service.gemini_cached_content is None
+
+
+@pytest.mark.parametrize(
+    "llm_service", [{"gemini_cached_content": "cachedContents/old"}], indirect=True
+)
+def test_failed_cached_call_falls_back_to_full_prompt(llm_service, mocker):
+    """
+    Tests that a primary-model call failing on the explicit cache (e.g. expired) is retried
+    without the cache binding, and later calls keep sending the full prompt.
+    """
+    call = mocker.patch.object(
+        llm_service,
+        "_call_extraction",
+        side_effect=[RuntimeError("404 CachedContent not found"), ("gemini-2.5-flash", _result())],
+    )
+
+    result = llm_service.extract_structured_data(SOURCE_TEXT, cascade=False)
+
+    assert result.records[0].cost == "27,256.52"
+    assert call.call_count == 2
+    assert llm_service.gemini_cached_content is None
+    assert len(llm_service.extraction_prompt.messages) == 2
+
+
+@pytest.mark.parametrize(
+    "llm_service", [{"gemini_cached_content": "cachedContents/old"}], indirect=True
+)
+def test_failed_call_on_replaced_cache_keeps_the_new_cache(llm_service):
+    """
+    Tests that a call that failed on a cache another thread has since replaced does not drop
+    the new cache, and that the handle and prompt layout always change together.
+    """
+    stale = llm_service._gemini_cache
+    llm_service._set_gemini_cache("cachedContents/new")
+
+    llm_service._drop_gemini_cache(stale[0], RuntimeError("404 CachedContent not found"))
+    handle, prompt = llm_service._gemini_cache
+
+    assert handle == "cachedContents/new"
+    assert len(prompt.messages) == 1
+
+
+class _CacheRejectingModel(GenericFakeChatModel):
+    """A chat model whose calls fail while bound to an explicit cache."""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if kwargs.get("cached_content"):
+            raise RuntimeError("404 CachedContent not found")
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "llm_service",
+    [
+        {
+            "openai_api_key": "test-key",
+            "gemini_cached_content": "cachedContents/expired",
+            "secondary_models": ["gpt-4o-mini"],
+        }
+    ],
+    indirect=True,
+)
+def test_failed_cached_call_falls_back_to_full_prompt_when_routed(llm_service):
+    """
+    Tests that with both providers configured a call failing on the explicit cache is
+    retried on Gemini without it, instead of counting as a Gemini error and failing over.
+    """
+    llm_service.llm = _CacheRejectingModel(
+        messages=iter([AIMessage(content=_result().model_dump_json(by_alias=True))])
+    )
+
+    result = llm_service.extract_structured_data(SOURCE_TEXT, cascade=False)
+    report = llm_service.get_routing_report()
+
+    assert result.records[0].cost == "27,256.52"
+    assert llm_service.gemini_cached_content is None
+    assert report["gemini"]["wins"] == 1
+    assert report["gemini"]["errors"] == 0
+    assert report["openai"]["requests"] == 0
@@ -0,0 +1,144 @@
+import asyncio
+import random
+
+import pytest
+
+from src.utils.provider_router import ProviderRouter
+
+
+def _call(result, delay=0.0, error=None, events=None):
+    """Builds a fake provider request that records whether it was cancelled."""
+
+    async def run():
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if events is not None:
+                events.append(f"{result} cancelled")
+            raise
+        if error is not None:
+            raise error
+        return result
+
+    return run
+
+
+def _measured_router(**latencies):
+    """Builds a router whose providers already have latency measurements."""
+    router = ProviderRouter(
+        list(latencies), default_hedge_delay=0.05, min_samples=1, rng=random.Random(0)
+    )
+    for provider, latency in latencies.items():
+        router.measurements(provider)["latencies"].extend([latency] * 5)
+    return router
+
+
+def test_slow_provider_is_hedged_and_loser_cancelled():
+    """
+    Tests that a call exceeding the hedge delay is duplicated on the other provider and
+    the slower request is cancelled once the faster one answers.
+    """
+    router = ProviderRouter(["gemini", "openai"], default_hedge_delay=0.05)
+    events = []
+
+    provider, result = router.invoke(
+        {
+            "gemini": _call("gemini", delay=2.0, events=events),
+            "openai": _call("openai", delay=0.01, events=events),
+        }
+    )
+    report = router.get_report()
+
+    assert (provider, result) == ("openai", "openai")
+    assert events == ["gemini cancelled"]
+    assert report["gemini"]["hedged"] == 1
+    assert report["openai"]["wins"] == 1
+
+
+def test_failed_provider_fails_over_and_raises_when_all_fail():
+    """
+    Tests that an error triggers an immediate retry on the next provider, and that the
+    last error is raised when every provider fails.
+    """
+    router = ProviderRouter(["gemini", "openai"], default_hedge_delay=10.0)
+
+    provider, _ = router.invoke(
+        {"gemini": _call("gemini", error=RuntimeError("503")), "openai": _call("openai")}
+    )
+    assert provider == "openai"
+    assert router.get_report()["gemini"]["errors"] == 1
+
+    with pytest.raises(RuntimeError, match="unavailable"):
+        router.invoke(
+            {
+                "gemini": _call("gemini", error=RuntimeError("gemini unavailable")),
+                "openai": _call("openai", error=RuntimeError("openai unavailable")),
+            }
+        )
+    report = router.get_report()
+    assert (report["gemini"]["errors"], report["openai"]["errors"]) == (2, 1)
+
+
+def test_routing_prefers_fast_reliable_provider():
+    """
+    Tests that most traffic goes to the faster provider and away from an erroring one.
+    """
+    router = _measured_router(gemini=4.0, openai=1.0)
+    firsts = [router.order(["gemini", "openai"])[0] for _ in range(200)]
+    assert firsts.count("openai") > 150
+
+    router.measurements("openai")["error_rate"] = 1.0
+    firsts = [router.order(["gemini", "openai"])[0] for _ in range(200)]
+    assert firsts.count("gemini") > 150
+
+
+def test_hedge_delay_uses_p95_latency():
+    """
+    Tests that the hedge delay is the provider's p95 latency once it has enough samples.
+    """
+    router = ProviderRouter(["gemini"], default_hedge_delay=20.0, min_samples=20)
+    router.measurements("gemini")["latencies"].extend(float(i) for i in range(1, 11))
+    assert router.hedge_delay("gemini") == 20.0
+
+    router.measurements("gemini")["latencies"].extend(float(i) for i in range(11, 101))
+    assert router.hedge_delay("gemini") == 95.0
+
+
+def test_call_types_are_measured_separately():
+    """
+    Tests that slow calls of one type do not raise the hedge delay or change the routing
+    of another type.
+    """
+    router = ProviderRouter(
+        ["gemini", "openai"], default_hedge_delay=20.0, min_samples=1, rng=random.Random(0)
+    )
+    router.measurements("gemini", "extraction:1")["latencies"].extend([60.0] * 5)
+    router.measurements("gemini", "extraction:0")["latencies"].extend([2.0] * 5)
+    router.measurements("openai", "extraction:0")["latencies"].extend([8.0] * 5)
+
+    assert router.hedge_delay("gemini", "extraction:0") == 2.0
+    assert router.hedge_delay("gemini", "extraction:1") == 60.0
+    assert router.order(["gemini", "openai"], "extraction:1") == ["openai", "gemini"]
+
+
+def test_fast_failing_provider_is_not_preferred():
+    """
+    Tests that a provider failing instantly is routed away from, rather than rewarded for
+    its short (failed) response times.
+    """
+    router = ProviderRouter(
+        ["gemini", "openai"], default_hedge_delay=10.0, min_samples=1, rng=random.Random(0)
+    )
+
+    for _ in range(30):
+        provider, _ = router.invoke(
+            {
+                "gemini": _call("gemini", error=RuntimeError("503")),
+                "openai": _call("openai", delay=0.01),
+            }
+        )
+        assert provider == "openai"
+    report = router.get_report()
+
+    assert report["gemini"]["requests"] < 5
+    assert report["gemini"]["calls"]["default"]["p50_latency"] is None
@@ -0,0 +1,38 @@
+from src.utils.record_stream import RecordStreamParser
+
+RESPONSE = (
+    '```json\n{"records": [\n'
+    '  {"Account Number": "7851218574918", "Meter Number": "{V349N}", "Cost": "4,582.36"},\n'
+    '  {"Account Number": "7851218574918", "Meter Number": "say \\"hi\\"", "Cost": "27.00"}\n'
+    "]}\n```"
+)
+
+
+def test_records_are_emitted_as_soon_as_they_close():
+    """
+    Tests that records split across arbitrary chunks are returned when their closing brace
+    arrives, ignoring braces and escaped quotes inside strings.
+    """
+    parser = RecordStreamParser()
+    emitted = []
+    for i in range(0, len(RESPONSE), 7):
+        emitted.append(parser.feed(RESPONSE[i : i + 7]))
+
+    records = [record for batch in emitted for record in batch]
+    first_batch = next(i for i, batch in enumerate(emitted) if batch)
+
+    assert [r["Meter Number"] for r in records] == ["{V349N}", 'say "hi"']
+    assert first_batch < len(emitted) - 3
+    assert parser.finished
+
+
+def test_truncated_response_keeps_complete_records():
+    """
+    Tests that a response cut off mid-record still yields the records before it.
+    """
+    parser = RecordStreamParser()
+    records = parser.feed(RESPONSE[: RESPONSE.index('"27.00"')])
+
+    assert len(records) == 1
+    assert records[0]["Cost"] == "4,582.36"
+    assert not parser.finished
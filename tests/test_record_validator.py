@@ -0,0 +1,70 @@
+from src.schemas import ExtractedRecord
+from src.utils.record_validator import validate_record, validate_records
+
+SOURCE_TEXT = """
+Your Account Number: 5356338-03
+Invoice Period: 01/02/2024 - 29/02/2024
+Electricity used: 1.234,5 kWh
+Total amount due: £456.70
+"""
+
+
+def _record(**overrides):
+    fields = {
+        "Account Number": "5356338-03",
+        "Meter Number": "-",
+        "From Date": "2024-02-01",
+        "To Date": "2024-02-29",
+        "Usage": "1,234.50",
+        "Cost": "456.70",
+    }
+    fields.update(overrides)
+    return ExtractedRecord.model_validate(fields)
+
+
+def test_valid_record_has_no_problems():
+    """
+    Tests that values normalised from regional formats are matched against the source.
+    """
+    assert validate_record(_record(), SOURCE_TEXT) == []
+
+
+def test_record_with_values_not_in_source_is_flagged():
+    """
+    Tests that hallucinated amounts and account numbers are reported.
+    """
+    problems = validate_record(
+        _record(**{"Account Number": "999", "Cost": "1,456.70"}), SOURCE_TEXT
+    )
+
+    assert any("account number" in problem for problem in problems)
+    assert any("cost" in problem for problem in problems)
+
+
+def test_non_us_number_formats_are_flagged():
+    """
+    Tests that amounts left in European format (or with stray symbols) are not accepted.
+    """
+    problems = validate_records([_record(Usage="1.234,50", Cost="£456.70")], SOURCE_TEXT)
+
+    assert problems == [
+        "record 1: usage '1.234,50' is not a US-formatted number",
+        "record 1: cost '£456.70' is not a US-formatted number",
+    ]
+    assert validate_record(_record(Usage="1234.5", Cost="456.70"), SOURCE_TEXT) == []
+
+
+def test_implausible_dates_are_flagged():
+    """
+    Tests that malformed, out-of-range and reversed billing periods are reported.
+    """
+    assert validate_record(_record(**{"From Date": "02/01/2024"}), SOURCE_TEXT)
+    assert validate_record(_record(**{"From Date": "1024-02-01"}), SOURCE_TEXT)
+    assert validate_record(_record(**{"From Date": "2024-03-01"}), SOURCE_TEXT)
+
+
+def test_empty_extraction_is_invalid():
+    """
+    Tests that a document without records fails validation.
+    """
+    assert validate_records([], SOURCE_TEXT) == ["no records extracted"]
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.server import create_app
+
+PDF_BYTES = b"%PDF-1.7 mock bill"
+
+
+class SlowExtractor:
+    """Stand-in DataExtractor that blocks until released, counting executions."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def extract_from_file(self, file_path):
+        self.calls += 1
+        self.release.wait(timeout=5)
+        return [{"Account Number": "ACC-12345", "Cost": "54,575.25", "Filename": file_path.stem}]
+
+
+def _run(coroutine_fn, extractor, **app_options):
+    async def runner():
+        client = TestClient(TestServer(create_app(extractor, **app_options)))
+        await client.start_server()
+        try:
+            return await coroutine_fn(client)
+        finally:
+            await client.close()
+
+    return asyncio.run(runner())
+
+
+def test_concurrent_identical_uploads_are_coalesced(tmp_path):
+    """
+    Tests that a burst of duplicate uploads costs a single pipeline execution and that the
+    stored upload is removed once it has been extracted.
+    """
+    extractor = SlowExtractor()
+
+    async def scenario(client):
+        requests = [client.post("/extract?filename=bill.pdf", data=PDF_BYTES) for _ in range(5)]
+        tasks = [asyncio.ensure_future(r) for r in requests]
+        await asyncio.sleep(0.2)
+        extractor.release.set()
+        responses = await asyncio.gather(*tasks)
+        bodies = [await response.text() for response in responses]
+        health = await (await client.get("/health")).json()
+        return responses, bodies, health
+
+    responses, bodies, health = _run(scenario, extractor, upload_dir=tmp_path)
+
+    assert extractor.calls == 1
+    assert all(response.status == 200 for response in responses)
+    assert all('"Filename": "bill"' in body for body in bodies)
+    assert health["executions"] == 1
+    assert health["coalesced"] == 4
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_non_pdf_upload_is_rejected(tmp_path):
+    """
+    Tests that uploads without a PDF header are refused before any extraction.
+    """
+    extractor = SlowExtractor()
+
+    async def scenario(client):
+        response = await client.post("/extract", data=b"not a pdf")
+        return response.status
+
+    assert _run(scenario, extractor, upload_dir=tmp_path) == 400
+    assert extractor.calls == 0
+
+
+def test_full_queue_returns_service_unavailable(tmp_path):
+    """
+    Tests that new documents are rejected with 503 once the admission queue is full.
+    """
+    extractor = SlowExtractor()
+
+    async def scenario(client):
+        first = asyncio.ensure_future(client.post("/extract", data=PDF_BYTES))
+        await asyncio.sleep(0.2)
+        second = await client.post("/extract", data=PDF_BYTES + b" other")
+        extractor.release.set()
+        await first
+        return second.status, second.headers.get("Retry-After")
+
+    status, retry_after = _run(
+        scenario, extractor, upload_dir=tmp_path, max_concurrent=1, max_queued=1
+    )
+
+    assert status == 503
+    assert retry_after == "5"
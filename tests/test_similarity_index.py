@@ -0,0 +1,76 @@
+from src.utils.similarity_index import NearDuplicateIndex, simhash
+
+BILL = (
+    """
+# Your electricity bill
+Customer account: 7851218574918
+Service Account Number: 8111757581
+Date bill prepared: 02/21/23
+| Your new charges | $27,256.52 |
+| Total amount you owe by 03/13/23 | $4,582.36 |
+Billing period: 01/20/23 - 02/19/23, usage 154,150 kWh
+"""
+    + "Please return the payment stub below with your payment. " * 10
+)
+
+REMINDER = BILL.replace("Date bill prepared: 02/21/23", "Date bill prepared: 03/01/23")
+
+RECORDS = [
+    {
+        "Account Number": "7851218574918",
+        "Meter Number": "-",
+        "From Date": "2023-01-20",
+        "To Date": "2023-02-19",
+        "Usage": "154,150.00",
+        "Cost": "27,256.52",
+    }
+]
+
+
+def test_simhash_is_close_for_near_duplicates():
+    """
+    Tests that a bill with a different footer date differs in only a few bits.
+    """
+    unrelated = simhash("Your Account Number 12345 Invoice Period gas supply statement")
+
+    assert (simhash(BILL) ^ simhash(REMINDER)).bit_count() <= 3
+    assert (simhash(BILL) ^ unrelated).bit_count() > 3
+
+
+def test_near_duplicate_reuses_verified_records(tmp_path):
+    """
+    Tests that a near-duplicate's records are reused and survive a reload from disk.
+    """
+    index = NearDuplicateIndex(tmp_path / "index.json", max_distance=3)
+    index.add("test1.pdf", simhash(BILL), RECORDS)
+
+    reloaded = NearDuplicateIndex(tmp_path / "index.json", max_distance=3)
+    match = reloaded.find_reusable_records(simhash(REMINDER), REMINDER)
+
+    assert match is not None
+    doc_id, records = match
+    assert doc_id == "test1.pdf"
+    assert records[0].cost == "27,256.52"
+
+
+def test_near_duplicate_with_different_amounts_is_not_reused(tmp_path):
+    """
+    Tests that records failing re-verification against the new text are not reused.
+    """
+    index = NearDuplicateIndex(tmp_path / "index.json", max_distance=3)
+    index.add("test1.pdf", simhash(BILL), [{**RECORDS[0], "Cost": "31,000.00"}])
+
+    assert index.find_reusable_records(simhash(REMINDER), REMINDER) is None
+
+
+def test_near_duplicate_for_a_new_billing_period_is_not_reused(tmp_path):
+    """
+    Tests that records are not reused when only the billing period changed, even though
+    the old amounts still appear on the bill.
+    """
+    next_period = BILL.replace("01/20/23 - 02/19/23", "02/20/23 - 03/21/23")
+    index = NearDuplicateIndex(tmp_path / "index.json", max_distance=3)
+    index.add("test1.pdf", simhash(BILL), RECORDS)
+
+    assert index.find(simhash(next_period)) is not None
+    assert index.find_reusable_records(simhash(next_period), next_period) is None
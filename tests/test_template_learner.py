@@ -0,0 +1,114 @@
+from src.config import CACHE_DIR
+from src.schemas import ExtractedRecord
+from src.utils.template_learner import TemplateLearner
+
+JANUARY_BILL = """
+# Your electricity bill
+Account Number: 7851218574918
+Meter number: V349N-005002
+Date bill prepared: 02/21/23
+
+# Your account summary
+| Your new charges | $27,256.52 |
+| Total amount you owe by 03/13/23 | $4,582.36 |
+
+Billing period
+01/23/23 to 02/20/23
+Total usage: 105,319 kWh
+"""
+
+FEBRUARY_BILL = (
+    JANUARY_BILL.replace("02/21/23", "03/22/23")
+    .replace("$27,256.52", "$31,004.10")
+    .replace("$4,582.36", "$8,329.94")
+    .replace("03/13/23", "04/12/23")
+    .replace("01/23/23 to 02/20/23", "02/21/23 to 03/21/23")
+    .replace("105,319", "98,442")
+)
+
+JANUARY_RECORD = ExtractedRecord.model_validate(
+    {
+        "Account Number": "7851218574918",
+        "Meter Number": "V349N-005002",
+        "From Date": "2023-01-23",
+        "To Date": "2023-02-20",
+        "Usage": "105,319.00",
+        "Cost": "4,582.36",
+    }
+)
+
+
+def test_template_extracts_next_bill_without_llm(tmp_path):
+    """
+    Tests that a template learned from one bill extracts the vendor's next bill, and that
+    it survives a reload from disk.
+    """
+    learner = TemplateLearner(tmp_path / "templates.json")
+    assert learner.learn("january.pdf", JANUARY_BILL, [JANUARY_RECORD])
+
+    doc_id, records = TemplateLearner(tmp_path / "templates.json").apply(FEBRUARY_BILL)
+
+    assert doc_id == "january.pdf"
+    assert records[0].model_dump(by_alias=True) == {
+        "Account Number": "7851218574918",
+        "Meter Number": "V349N-005002",
+        "From Date": "2023-02-21",
+        "To Date": "2023-03-21",
+        "Usage": "98,442.00",
+        "Cost": "8,329.94",
+    }
+
+
+def test_template_falls_back_when_layout_or_values_do_not_fit(tmp_path):
+    """
+    Tests that unrelated layouts and templated records failing validation are left to the LLM.
+    """
+    learner = TemplateLearner(tmp_path / "templates.json")
+    learner.learn("january.pdf", JANUARY_BILL, [JANUARY_RECORD])
+
+    unrelated = "Gas supply statement\nInvoice 12345\nSupply period 2024-01-01 - 2024-01-31\n"
+    reversed_period = FEBRUARY_BILL.replace("02/21/23 to 03/21/23", "03/21/23 to 02/21/23")
+
+    assert learner.apply(unrelated) is None
+    assert learner.apply(reversed_period) is None
+
+
+def test_template_not_learned_from_unverified_extraction(tmp_path):
+    """
+    Tests that records which fail validation or span several records are not learned.
+    """
+    learner = TemplateLearner(tmp_path / "templates.json")
+    wrong_cost = JANUARY_RECORD.model_copy(update={"cost": "9,999.99"})
+
+    assert not learner.learn("january.pdf", JANUARY_BILL, [wrong_cost])
+    assert not learner.learn("january.pdf", JANUARY_BILL, [JANUARY_RECORD, JANUARY_RECORD])
+    assert not (tmp_path / "templates.json").exists()
+
+
+def test_template_from_cached_bill_anchors_dates_on_billing_period(tmp_path):
+    """
+    Tests, on a real parsed bill, that dates are anchored on the billing period line rather
+    than an earlier demand timestamp that happens to share the period's start date.
+    """
+    (cached_bill,) = CACHE_DIR.glob("test1_*.md")
+    january_bill = cached_bill.read_text(encoding="utf-8")
+    february_bill = (
+        january_bill.replace("01/23/23 to 02/20/23", "02/21/23 to 03/21/23")
+        .replace("01/23/23 08:45am", "03/02/23 08:45am")
+        .replace("4,582.36", "4,712.90")
+        .replace("105,319", "98,442")
+        .replace("105319", "98442")
+    )
+    learner = TemplateLearner(tmp_path / "templates.json")
+    assert learner.learn("test1.pdf", january_bill, [JANUARY_RECORD])
+
+    _, records = learner.apply(february_bill)
+
+    assert records[0].model_dump(by_alias=True) == {
+        "Account Number": "7851218574918",
+        "Meter Number": "V349N-005002",
+        "From Date": "2023-02-21",
+        "To Date": "2023-03-21",
+        "Usage": "98,442.00",
+        "Cost": "4,712.90",
+    }
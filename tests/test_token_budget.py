@@ -0,0 +1,87 @@
+from unittest.mock import MagicMock
+
+from src.utils.token_budget import DEFER, FULL, PRUNED, TokenBudgetScheduler, estimate_tokens
+
+BILLING_PARAGRAPH = "Account Number: 7851218574918\nTotal amount due: $4,582.36\nUsage: 1,234 kWh"
+NOISE_PARAGRAPH = "Please return the payment stub below with your payment. " * 20
+
+
+def _scheduler(**overrides):
+    options = {
+        "run_token_budget": 100_000,
+        "document_token_budget": 10_000,
+        "run_deadline_seconds": 60,
+        "document_deadline_seconds": 60,
+        "call_overhead_tokens": 100,
+    }
+    options.update(overrides)
+    return TokenBudgetScheduler(**options)
+
+
+def test_small_document_runs_in_full():
+    """
+    Tests that a document within budget is dispatched unchanged.
+    """
+    decision, allowance = _scheduler().plan([BILLING_PARAGRAPH])
+
+    assert decision == FULL
+    assert allowance == 10_000
+
+
+def test_oversized_document_is_pruned_to_relevant_text():
+    """
+    Tests that an over-budget document keeps its billing text and drops boilerplate.
+    """
+    scheduler = _scheduler(document_token_budget=400)
+    pieces = [NOISE_PARAGRAPH, BILLING_PARAGRAPH, NOISE_PARAGRAPH]
+
+    decision, allowance = scheduler.plan(["\n\n".join(pieces)])
+    kept = scheduler.prune(pieces, allowance - 2 * scheduler.call_overhead_tokens)
+
+    assert decision == PRUNED
+    assert kept == [BILLING_PARAGRAPH]
+
+
+def test_exhausted_run_budget_defers_documents():
+    """
+    Tests that documents are deferred once the run budget is spent.
+    """
+    scheduler = _scheduler(run_token_budget=1_000)
+    scheduler.charge(900)
+
+    decision, _ = scheduler.plan([BILLING_PARAGRAPH])
+
+    assert decision == DEFER
+    assert scheduler.get_report()["tokens_remaining"] == 100
+
+
+def test_run_deadline_defers_documents():
+    """
+    Tests that documents are deferred once the run deadline has passed.
+    """
+    scheduler = _scheduler(run_deadline_seconds=0)
+
+    assert scheduler.plan([BILLING_PARAGRAPH]) == (DEFER, 0)
+
+
+def test_estimate_tokens_grows_with_text():
+    """
+    Tests that token estimates are positive and monotonic in text length.
+    """
+    assert 0 < estimate_tokens(BILLING_PARAGRAPH) < estimate_tokens(BILLING_PARAGRAPH * 10)
+
+
+def test_document_spend_is_checked_before_further_calls():
+    """
+    Tests that a document whose measured spend leaves no room for another call is stopped
+    before escalating or consolidating.
+    """
+    scheduler = _scheduler()
+    llm_service = MagicMock(usage={"input_tokens": 1_000, "output_tokens": 0})
+    checkpoint = scheduler.checkpoint(llm_service)
+
+    assert scheduler.within_document_budget(llm_service, checkpoint, 2_000, [BILLING_PARAGRAPH])
+
+    llm_service.usage["input_tokens"] += 1_850
+    assert scheduler.within_document_budget(llm_service, checkpoint, 2_000, [])
+    assert not scheduler.within_document_budget(llm_service, checkpoint, 2_000, [BILLING_PARAGRAPH])